@@ -0,0 +1,36 @@
+"""
+Add resources.updated_at and the resource_changes outbox for delta reindexing.
+
+Revision ID: add_resource_change_journal
+Revises: add_resource_content_hash
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_resource_change_journal'
+down_revision = 'add_resource_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'resources',
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_table(
+        'resource_changes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('resource_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=8), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_resource_changes_resource_id', 'resource_changes', ['resource_id'])
+
+
+def downgrade():
+    op.drop_index('ix_resource_changes_resource_id', table_name='resource_changes')
+    op.drop_table('resource_changes')
+    op.drop_column('resources', 'updated_at')
@@ -0,0 +1,26 @@
+"""
+Add content_hash to resources and enforce unique DOIs for upserts.
+
+Revision ID: add_resource_content_hash
+Revises: rename_type_to_resource_type
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_resource_content_hash'
+down_revision = 'rename_type_to_resource_type'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('resources', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    # databases created from db_init/init.sql already carry a UNIQUE(doi) constraint
+    op.create_index('ix_resources_doi', 'resources', ['doi'], unique=True, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_resources_doi', table_name='resources', if_exists=True)
+    op.drop_column('resources', 'content_hash')
@@ -0,0 +1,27 @@
+"""
+Store resources.fulltext uncompressed out of line so substr() can slice it.
+
+Only affects values written afterwards; run ``UPDATE resources SET fulltext =
+fulltext`` to rewrite existing rows.
+
+Revision ID: fulltext_storage_external
+Revises: add_resource_change_journal
+Create Date: 2026-10-18 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'fulltext_storage_external'
+down_revision = 'add_resource_change_journal'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TABLE resources ALTER COLUMN fulltext SET STORAGE EXTERNAL")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TABLE resources ALTER COLUMN fulltext SET STORAGE EXTENDED")
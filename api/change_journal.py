@@ -0,0 +1,24 @@
+"""
+Change journal (transactional outbox) for keeping Solr in sync with Postgres.
+
+Every resource write adds a row to ``resource_changes`` inside the same
+transaction, so a change can never be committed without being journaled.
+``api/scripts/reindex.py --delta`` drains the journal into Solr and deletes
+the entries it pushed, which makes the last drained id the high-water mark.
+"""
+from sqlalchemy.orm import Session
+
+from api.models import ResourceChangeModel
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+def record_change(db: Session, resource_id: int, op: str = UPSERT) -> None:
+    """Journal a write to ``resource_id``; flushed with the caller's transaction."""
+    db.add(ResourceChangeModel(resource_id=resource_id, op=op))
+
+
+def record_changes(db: Session, resource_ids, op: str = UPSERT) -> None:
+    """Journal many writes at once (bulk loads)."""
+    db.add_all([ResourceChangeModel(resource_id=rid, op=op) for rid in resource_ids])
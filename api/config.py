@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyHttpUrl
 
@@ -10,6 +12,62 @@ class Settings(BaseSettings):
     db_port: int = 5432
 
     solr_url: AnyHttpUrl = "http://solr:8983/solr/ecology"
+    # pooled Solr transport (per worker process)
+    solr_pool_size: int = 20
+    solr_connect_timeout: float = 2.0
+    solr_read_timeout: float = 10.0
+    solr_retries: int = 2
+    solr_retry_backoff: float = 0.2
+
+    # search result cache: in-process LRU/TTL, optionally backed by Redis
+    search_cache_size: int = 1024
+    search_cache_ttl: float = 60.0
+    search_cache_version_ttl: float = 1.0  # how often Solr's index version is re-read
+    search_cache_redis_url: Optional[str] = None
+
+    # /resources totals: exact | cached | estimated | none
+    resource_count_strategy: str = "cached"
+    resource_count_ttl: float = 300.0
+    # abstracts in list responses are cut to this many characters
+    list_abstract_chars: int = 500
+    # bytes read per query by GET /resources/{id}/fulltext
+    fulltext_chunk_bytes: int = 65536
+
+    # assembled ?expand=resources exhibit payloads (per worker)
+    exhibit_cache_size: int = 256
+    exhibit_cache_ttl: float = 600.0
+
+    # POST /resources/bulk and the coalescing Solr indexer
+    bulk_batch_size: int = 1000
+    bulk_max_errors: int = 100
+    index_batch_size: int = 500
+    index_flush_seconds: float = 1.0
+    index_commit_within_ms: int = 5000
+    index_max_pending: int = 10000
+    index_max_retries: int = 5
+
+    # local text-generation model (api/llm.py)
+    llm_model: str = "google/flan-t5-small"
+    llm_max_length: int = 512
+    # prompt budget in tokens (flan-t5 reads at most 512) and when to switch to map-reduce
+    llm_context_tokens: int = 512
+    llm_map_reduce: bool = True
+    llm_warmup: bool = False  # load at startup and hold /readyz until done
+    llm_worker: bool = False  # generate in a separate local process
+    # micro-batching of concurrent prompts (api/inference.py)
+    inference_max_batch: int = 8
+    inference_max_wait_ms: float = 20.0
+    inference_max_streams: int = 2  # concurrent streamed generations (not batched)
+
+    # persistent summary cache (SQLite, LRU)
+    summary_cache_path: str = "/cache/summaries.sqlite3"
+    summary_cache_size: int = 5000
+
+    # GraphQL cost limits
+    graphql_max_depth: int = 6
+    graphql_max_aliases: int = 30
+    graphql_max_tokens: int = 2000
+    graphql_max_page_size: int = 100
 
     @property
     def database_url(self) -> str:
@@ -0,0 +1,145 @@
+"""
+Token-budgeted prompt assembly for the summary and agent routes.
+
+Passages are tokenized once with the model's tokenizer. When they fit in
+``settings.llm_context_tokens`` together with the instructions, they are
+ranked (by overlap with the query, if there is one) and packed into a single
+prompt, trimming the last passage that only partly fits. When they do not
+fit, the assembler switches to map-reduce: passages are packed into
+budget-sized chunks, each chunk is summarized concurrently (the inference
+scheduler batches these), and the partial summaries are combined by the final
+prompt. Either way the model never sees a prompt it would silently truncate,
+and the cost of a request tracks the budget rather than the input length.
+"""
+import asyncio
+import re
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+
+from api import llm
+from api.config import settings
+
+MAP_HEADER = "Summarize the key points of the following passages:\n\n"
+SEPARATOR = "\n\n"
+# smallest useful remainder when trimming a passage into the leftover budget
+MIN_TRIM_TOKENS = 24
+# map-reduce rounds before falling back to trimming what is left
+MAX_ROUNDS = 3
+
+_WORDS = re.compile(r"\w+")
+
+
+def _terms(text: str) -> set:
+    return {word for word in _WORDS.findall(text.lower()) if len(word) > 2}
+
+
+def rank_passages(passages: Sequence[str], query: Optional[str]) -> List[int]:
+    """Passage indexes, most relevant first: term overlap with ``query``, else input order."""
+    if not query:
+        return list(range(len(passages)))
+    wanted = _terms(query)
+    scores = [len(wanted & _terms(passage)) for passage in passages]
+    return sorted(range(len(passages)), key=lambda i: (-scores[i], i))
+
+
+class ContextAssembler:
+    def __init__(self, tokenizer, budget: int):
+        self.tokenizer = tokenizer
+        self.budget = budget
+        self._separator = self.count(SEPARATOR)
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        """Token ids for each text, in one batched tokenizer call."""
+        if not texts:
+            return []
+        return self.tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+
+    def count(self, text: str) -> int:
+        return len(self.encode([text])[0]) if text else 0
+
+    def room(self, header: str, footer: str = "") -> int:
+        # leave one token for the end-of-sequence marker the pipeline appends
+        return self.budget - self.count(header) - self.count(footer) - 1
+
+    def fit(
+        self,
+        header: str,
+        passages: Sequence[str],
+        encoded: Sequence[List[int]],
+        query: Optional[str] = None,
+        footer: str = "",
+    ) -> str:
+        """One prompt holding the best-ranked passages that fit the budget."""
+        room = self.room(header, footer)
+        chosen = []
+        for i in rank_passages(passages, query):
+            cost = len(encoded[i]) + (self._separator if chosen else 0)
+            if cost <= room:
+                chosen.append(passages[i])
+                room -= cost
+            else:
+                keep = room - (self._separator if chosen else 0)
+                if keep >= MIN_TRIM_TOKENS or not chosen:
+                    chosen.append(self.tokenizer.decode(encoded[i][:max(0, keep)], skip_special_tokens=True))
+                    break
+        return header + SEPARATOR.join(chosen) + footer
+
+    def pack(self, header: str, passages: Sequence[str], encoded: Sequence[List[int]]) -> List[str]:
+        """Split passages, in order, into as few budget-sized prompts as possible."""
+        room = self.room(header)
+        prompts, current, used = [], [], 0
+        for passage, ids in zip(passages, encoded):
+            if len(ids) > room:
+                passage, ids = self.tokenizer.decode(ids[:room], skip_special_tokens=True), ids[:room]
+            cost = len(ids) + (self._separator if current else 0)
+            if current and used + cost > room:
+                prompts.append(header + SEPARATOR.join(current))
+                current, used, cost = [], 0, len(ids)
+            current.append(passage)
+            used += cost
+        if current:
+            prompts.append(header + SEPARATOR.join(current))
+        return prompts
+
+    def fits(self, header: str, encoded: Sequence[List[int]], footer: str = "") -> bool:
+        total = sum(len(ids) for ids in encoded) + self._separator * max(0, len(encoded) - 1)
+        return total <= self.room(header, footer)
+
+
+def get_assembler() -> ContextAssembler:
+    return ContextAssembler(llm.registry.tokenizer(), settings.llm_context_tokens)
+
+
+async def assemble_prompt(
+    header: str,
+    passages: Sequence[str],
+    generate: Callable[[str], Awaitable[str]],
+    query: Optional[str] = None,
+    footer: str = "",
+    assembler: Optional[ContextAssembler] = None,
+) -> str:
+    """
+    The final prompt for ``passages``. ``generate`` runs the map step when the
+    passages exceed the budget (pass the inference scheduler's ``agenerate``).
+    Loading the tokenizer and tokenizing run in the threadpool, off the event
+    loop.
+    """
+    assembler = assembler or await run_in_threadpool(get_assembler)
+    passages = [p for p in passages if p and p.strip()]
+    encoded = await run_in_threadpool(assembler.encode, passages)
+    rounds = 0
+    while (
+        settings.llm_map_reduce
+        and len(passages) > 1
+        and rounds < MAX_ROUNDS
+        and not await run_in_threadpool(assembler.fits, header, encoded, footer)
+    ):
+        # map: summarize budget-sized chunks concurrently, then reduce over the partials
+        order = rank_passages(passages, query)
+        ranked = [passages[i] for i in order]
+        chunks = await run_in_threadpool(assembler.pack, MAP_HEADER, ranked, [encoded[i] for i in order])
+        passages = list(await asyncio.gather(*(generate(chunk) for chunk in chunks)))
+        encoded = await run_in_threadpool(assembler.encode, passages)
+        query, rounds = None, rounds + 1  # partials are already in relevance order
+    return await run_in_threadpool(assembler.fit, header, passages, encoded, query=query, footer=footer)
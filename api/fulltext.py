@@ -0,0 +1,128 @@
+"""
+Chunked reads of ``resources.fulltext`` for the streaming download endpoint.
+
+The text is addressed as UTF-8 bytes but read as character slices, one
+``substr(fulltext, ...)`` query per ``settings.fulltext_chunk_bytes``
+characters, with byte offsets tracked here. With the column stored
+``EXTERNAL`` (uncompressed, see the ``fulltext_storage_external``
+migration) Postgres fetches only the TOAST chunks a slice needs instead of
+detoasting the whole document for every query, and a worker holds at most
+one slice of a document at a time.
+"""
+import re
+import zlib
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import LargeBinary, cast, func, select
+from sqlalchemy.engine import Engine
+
+from api.config import settings
+from api.models import ResourceModel
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def fulltext_length(engine: Engine):
+    """SQL expression for the fulltext's length in UTF-8 bytes on ``engine``'s dialect."""
+    if engine.dialect.name == "postgresql":
+        # the database encoding is UTF-8; octet_length reads the TOAST header, not the value
+        return func.octet_length(ResourceModel.fulltext)
+    return func.length(cast(ResourceModel.fulltext, LargeBinary))
+
+
+def fulltext_info(db, resource_id: int) -> Optional[Tuple[object, Optional[int]]]:
+    """``(updated_at, byte length)`` of a resource, or ``None`` if it does not exist."""
+    return db.execute(
+        select(ResourceModel.updated_at, fulltext_length(db.get_bind())).where(ResourceModel.id == resource_id)
+    ).one_or_none()
+
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive ``(start, end)`` for a single ``bytes=`` range, or ``None`` to
+    send the whole text. Malformed and multi-range headers are ignored, as
+    RFC 9110 allows; a well-formed range outside the text raises.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # suffix range: the last N bytes
+        start, end = max(0, length - int(last)), length - 1
+    else:
+        start = int(first)
+        end = min(int(last), length - 1) if last else length - 1
+    if start >= length or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def version_tag(resource_id: int, updated_at, length: int) -> str:
+    """
+    Validator for a resource's fulltext. ``updated_at`` is kept to the
+    microsecond, so two same-length edits within one second still differ.
+    """
+    stamp = updated_at.strftime("%Y%m%d%H%M%S%f") if updated_at else "0"
+    return f"{resource_id}-{stamp}-{length}"
+
+
+def accepts_gzip(header: Optional[str]) -> bool:
+    """
+    Whether an ``Accept-Encoding`` header allows gzip: listed (or covered by
+    ``*``) with a non-zero q-value, so ``gzip;q=0`` refuses it.
+    """
+    qualities = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def iter_fulltext(engine: Engine, resource_id: int, start: int, end: int) -> Iterator[bytes]:
+    """
+    Yield bytes ``start..end`` (inclusive) of a resource's fulltext. Uses its
+    own connection, so it outlives the request's session while streaming.
+    """
+    chunk = settings.fulltext_chunk_bytes
+    with engine.connect() as conn:
+        offset, position = 0, 1  # byte offset and 1-based character position of the next slice
+        while offset <= end:
+            text = conn.execute(
+                select(func.substr(ResourceModel.fulltext, position, chunk)).where(ResourceModel.id == resource_id)
+            ).scalar()
+            if not text:
+                return
+            piece = text.encode("utf-8")
+            if offset + len(piece) > start:
+                yield piece[max(0, start - offset):end - offset + 1]
+            offset += len(piece)
+            position += len(text)
+
+
+def gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream on the fly as a single gzip member."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for piece in chunks:
+        out = compressor.compress(piece)
+        if out:
+            yield out
+    yield compressor.flush()
@@ -1,13 +1,25 @@
 import datetime
-from typing import List, Optional
+from typing import Dict, FrozenSet, List, Optional
 
 import strawberry
+from strawberry.dataloader import DataLoader
+from strawberry.extensions import MaxAliasesLimiter, MaxTokensLimiter, QueryDepthLimiter
 from strawberry.fastapi import GraphQLRouter
+from strawberry.utils.str_converters import to_camel_case
 from fastapi import Depends
 from sqlalchemy import select
 
+from api.config import settings
 from api.dependencies import get_db
 from api.models import ResourceModel
+from api.pagination import after_id, encode_cursor
+
+# columns a ResourceType can be built from, keyed by their GraphQL field name
+RESOURCE_COLUMNS = (
+    "id", "title", "resource_type", "date", "authors", "abstract",
+    "doi", "url", "keywords", "provider", "fulltext",
+)
+_FIELD_COLUMNS = {to_camel_case(name): name for name in RESOURCE_COLUMNS}
 
 
 @strawberry.type
@@ -24,63 +36,101 @@ class ResourceType:
     provider: str
     fulltext: Optional[str]
 
+    @strawberry.field(description="Opaque position of this item; pass as `after` to resume the list")
+    def cursor(self) -> str:
+        return encode_cursor({"id": self.id})
+
+
+def _requested_columns(info) -> FrozenSet[str]:
+    """
+    Columns needed for the selection set under the current field, so a query
+    for ``id title`` never reads ``fulltext``. Fragments are followed; ``id``
+    is always loaded (it keys the loader and backs ``cursor``).
+    """
+    columns = {"id"}
+    pending = list(info.selected_fields[0].selections)
+    while pending:
+        node = pending.pop()
+        name = getattr(node, "name", None)
+        if name in _FIELD_COLUMNS:
+            columns.add(_FIELD_COLUMNS[name])
+        else:
+            # fragment spreads and inline fragments carry their own selections
+            pending.extend(getattr(node, "selections", ()))
+    return frozenset(columns)
+
+
+def _to_type(row, columns: FrozenSet[str]) -> ResourceType:
+    # unrequested fields are never resolved, so leaving them None is safe
+    values = {name: None for name in RESOURCE_COLUMNS}
+    values.update({name: getattr(row, name) for name in columns})
+    if values["url"] is not None:
+        values["url"] = str(values["url"])
+    return ResourceType(**values)
+
+
+def _projected(columns: FrozenSet[str]):
+    return select(*[getattr(ResourceModel, name) for name in sorted(columns)])
+
+
+def _resource_loader(info, columns: FrozenSet[str]) -> DataLoader:
+    """
+    Per-request loader for one column set: every ``resource(id:)`` in the
+    operation that asks for the same fields is answered by one ``IN`` query.
+    """
+    loaders: Dict[FrozenSet[str], DataLoader] = info.context["loaders"]
+    if columns not in loaders:
+        db = info.context["db"]
+
+        async def load(ids: List[int]) -> List[Optional[ResourceType]]:
+            rows = db.execute(_projected(columns).where(ResourceModel.id.in_(ids))).all()
+            by_id = {row.id: _to_type(row, columns) for row in rows}
+            return [by_id.get(rid) for rid in ids]
+
+        loaders[columns] = DataLoader(load_fn=load)
+    return loaders[columns]
+
 
 @strawberry.type
 class Query:
     @strawberry.field
-    def resource(self, info, id: int) -> Optional[ResourceType]:
-        db = info.context["db"]
-        model = db.get(ResourceModel, id)
-        if not model:
-            return None
-        return ResourceType(
-            id=model.id,
-            title=model.title,
-            resource_type=model.resource_type,
-            date=model.date,
-            authors=model.authors,
-            abstract=model.abstract,
-            doi=model.doi,
-            url=model.url,
-            keywords=model.keywords,
-            provider=model.provider,
-            fulltext=model.fulltext,
-        )
+    async def resource(self, info: strawberry.Info, id: int) -> Optional[ResourceType]:
+        return await _resource_loader(info, _requested_columns(info)).load(id)
 
     @strawberry.field
     def resources(
         self,
-        info,
+        info: strawberry.Info,
         page: int = 1,
         page_size: int = 20,
+        after: Optional[str] = None,
     ) -> List[ResourceType]:
         db = info.context["db"]
-        stmt = select(ResourceModel).offset((page - 1) * page_size).limit(page_size)
-        models = db.execute(stmt).scalars().all()
-        return [
-            ResourceType(
-                id=m.id,
-                title=m.title,
-                resource_type=m.resource_type,
-                date=m.date,
-                authors=m.authors,
-                abstract=m.abstract,
-                doi=m.doi,
-                url=m.url,
-                keywords=m.keywords,
-                provider=m.provider,
-                fulltext=m.fulltext,
-            )
-            for m in models
-        ]
+        columns = _requested_columns(info)
+        page_size = max(1, min(page_size, settings.graphql_max_page_size))
+        stmt = _projected(columns).order_by(ResourceModel.id).limit(page_size)
+        if after:
+            # keyset paging; `page` is ignored once a cursor is given (a bad token surfaces as a GraphQL error)
+            stmt = stmt.where(ResourceModel.id > after_id(after))
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+        return [_to_type(row, columns) for row in db.execute(stmt).all()]
 
 
 def get_context(db=Depends(get_db)):
-    return {"db": db}
+    return {"db": db, "loaders": {}}
+
 
-schema = strawberry.Schema(query=Query)
+schema = strawberry.Schema(
+    query=Query,
+    extensions=[
+        QueryDepthLimiter(max_depth=settings.graphql_max_depth),
+        MaxAliasesLimiter(max_alias_count=settings.graphql_max_aliases),
+        MaxTokensLimiter(max_token_count=settings.graphql_max_tokens),
+    ],
+)
 graphql_app = GraphQLRouter(
     schema,
     context_getter=get_context,
     graphql_ide=True,
-)
\ No newline at end of file
+)
@@ -0,0 +1,202 @@
+"""
+Coalescing Solr indexer for API writes.
+
+Adds and deletes handed to :data:`indexer` are buffered by id (the latest
+operation on a resource replaces earlier ones) and flushed to Solr by a
+background thread once ``settings.index_batch_size`` operations are waiting
+or ``settings.index_flush_seconds`` have passed. Flushes never hard-commit:
+Solr makes them visible through ``commitWithin`` (and the soft autocommit in
+``solrconfig.xml``), so API writes no longer open a new searcher each.
+
+Failed flushes are requeued and retried with backoff. The buffer is bounded
+(``settings.index_max_pending``); when Solr is down long enough to fill it,
+a submit waits at most ``submit_timeout`` in total for room, and whatever
+does not fit by then is dropped. Nothing is lost for good:
+every write is in the change journal, and the delta sync replays it. Call
+:meth:`IndexingQueue.drain` on shutdown to flush what is left.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from api.config import settings
+from api.solr_client import delete_resources, index_resources
+
+logger = logging.getLogger(__name__)
+
+ADD = "add"
+DELETE = "delete"
+
+INDEX_QUEUE_PENDING = Gauge("solr_index_queue_pending", "Operations waiting in the indexing queue")
+INDEX_QUEUE_FLUSHED = Counter("solr_index_queue_flushed_total", "Operations sent to Solr", ["op"])
+INDEX_QUEUE_FAILURES = Counter("solr_index_queue_failures_total", "Failed indexing flushes")
+INDEX_QUEUE_DROPPED = Counter(
+    "solr_index_queue_dropped_total", "Operations dropped and left to the delta sync", ["reason"],
+)
+
+
+class IndexingQueue:
+    def __init__(
+        self,
+        batch_size: int,
+        flush_seconds: float,
+        commit_within: int,
+        max_pending: int = 10000,
+        max_retries: int = 5,
+        retry_backoff: float = 0.5,
+        submit_timeout: float = 1.0,
+    ):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.commit_within = commit_within
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.submit_timeout = submit_timeout
+        self._pending: Dict[str, Tuple[str, Optional[dict]]] = {}
+        self._cond = threading.Condition()
+        self._failures = 0
+        self._stopping = False
+        self._thread = None
+
+    def submit(self, docs: Iterable[dict]) -> None:
+        """Queue Solr documents for indexing; returns without waiting for Solr."""
+        self._enqueue((str(doc["id"]), (ADD, doc)) for doc in docs)
+
+    def submit_delete(self, resource_ids: Iterable[int]) -> None:
+        """Queue deletions."""
+        self._enqueue((str(rid), (DELETE, None)) for rid in resource_ids)
+
+    def _enqueue(self, ops) -> None:
+        # one deadline for the whole call: a big batch against a stalled Solr
+        # waits submit_timeout once, not once per operation
+        deadline = time.monotonic() + self.submit_timeout
+        with self._cond:
+            for key, op in ops:
+                if key not in self._pending and not self._wait_for_room(deadline):
+                    INDEX_QUEUE_DROPPED.labels("full").inc()
+                    continue
+                self._pending[key] = op
+            INDEX_QUEUE_PENDING.set(len(self._pending))
+            self._ensure_thread()
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _wait_for_room(self, deadline: float) -> bool:
+        # called with the lock held; a full buffer means Solr is not keeping up
+        if len(self._pending) < self.max_pending:
+            return True
+        self._cond.notify_all()
+        while len(self._pending) >= self.max_pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Indexing queue full; dropping writes until Solr catches up (the delta sync will replay them)")
+                return False
+            self._cond.wait(remaining)
+        return True
+
+    def flush(self) -> int:
+        """Send everything queued now, from the calling thread; requeues on failure."""
+        sent = 0
+        while True:
+            with self._cond:
+                keys = list(self._pending)[:self.batch_size]
+                batch = {key: self._pending.pop(key) for key in keys}
+                INDEX_QUEUE_PENDING.set(len(self._pending))
+                self._cond.notify_all()
+            if not batch:
+                return sent
+            try:
+                self._send(batch)
+            except Exception:
+                self._requeue(batch)
+                raise
+            sent += len(batch)
+
+    def _send(self, batch) -> None:
+        docs = [doc for op, doc in batch.values() if op == ADD]
+        gone = [int(key) for key, (op, _) in batch.items() if op == DELETE]
+        if docs:
+            index_resources(docs, commit=False, commit_within=self.commit_within)
+            INDEX_QUEUE_FLUSHED.labels(ADD).inc(len(docs))
+        if gone:
+            delete_resources(gone, commit=False, commit_within=self.commit_within)
+            INDEX_QUEUE_FLUSHED.labels(DELETE).inc(len(gone))
+
+    def _requeue(self, batch) -> None:
+        with self._cond:
+            for key, op in batch.items():
+                # a newer operation on the same id queued meanwhile wins
+                self._pending.setdefault(key, op)
+            INDEX_QUEUE_PENDING.set(len(self._pending))
+
+    def _discard(self) -> None:
+        with self._cond:
+            INDEX_QUEUE_DROPPED.labels("retries").inc(len(self._pending))
+            self._pending.clear()
+            INDEX_QUEUE_PENDING.set(0)
+            self._cond.notify_all()
+
+    def drain(self, timeout: float = 10.0) -> int:
+        """
+        Stop the background thread and flush what is queued. Returns the
+        number of operations still unsent (left to the delta sync).
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not drain the indexing queue; the delta sync will replay the rest")
+        with self._cond:
+            return len(self._pending)
+
+    def _ensure_thread(self) -> None:
+        if self._stopping:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="solr-indexer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                wait = self.flush_seconds
+                if self._failures:
+                    wait = min(30.0, self.retry_backoff * 2 ** (self._failures - 1))
+                deadline = time.monotonic() + wait
+                while not self._stopping and (self._failures or len(self._pending) < self.batch_size):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            try:
+                sent = self.flush()
+                self._failures = 0
+                if sent:
+                    logger.debug("Indexed %d queued operations", sent)
+            except Exception:
+                INDEX_QUEUE_FAILURES.inc()
+                self._failures += 1
+                logger.exception("Queued Solr indexing failed (attempt %d)", self._failures)
+                if self._failures > self.max_retries:
+                    logger.error("Giving up on queued Solr writes; the delta sync will replay them")
+                    self._discard()
+                    self._failures = 0
+
+
+indexer = IndexingQueue(
+    settings.index_batch_size,
+    settings.index_flush_seconds,
+    settings.index_commit_within_ms,
+    max_pending=settings.index_max_pending,
+    max_retries=settings.index_max_retries,
+)
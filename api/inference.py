@@ -0,0 +1,175 @@
+"""
+Micro-batching scheduler in front of the text-generation model.
+
+Requests submit a single prompt and get a future back. A scheduler thread
+takes the first waiting prompt, keeps collecting for up to
+``settings.inference_max_wait_ms`` or until ``settings.inference_max_batch``
+prompts are queued, and runs them as one batched pipeline call. Concurrent
+users therefore share a forward pass instead of queueing behind each other
+on the CPU. Prompts with different generation arguments are never mixed in
+one batch.
+
+Streaming requests cannot share a batch (each client reads its own tokens as
+they are decoded), so :func:`stream_generate` runs one generation per request,
+at most ``settings.inference_max_streams`` at a time, and stops it at the
+next decoding step once the client has gone away.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import iterate_in_threadpool
+from prometheus_client import Counter, Gauge, Histogram
+
+from api import llm
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_QUEUE_DEPTH = Gauge("inference_queue_depth", "Prompts waiting for a generation batch")
+INFERENCE_BATCH_SIZE = Histogram(
+    "inference_batch_size", "Prompts per generation batch", buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+INFERENCE_LATENCY = Histogram(
+    "inference_stage_seconds", "Generation latency by stage (queue, generate, first_token, total)", ["stage"],
+)
+INFERENCE_STREAMS_CANCELLED = Counter(
+    "inference_streams_cancelled_total", "Streamed generations stopped because the client disconnected",
+)
+
+
+class _Job:
+    __slots__ = ("prompt", "kwargs", "future", "enqueued")
+
+    def __init__(self, prompt: str, kwargs: Dict[str, Any]):
+        self.prompt = prompt
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+
+
+class BatchScheduler:
+    def __init__(self, max_batch: int, max_wait: float):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._held: List[_Job] = []  # jobs with other kwargs, kept for the next batch
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, prompt: str, **kwargs: Any) -> Future:
+        """Queue one prompt; the future resolves to its generated text."""
+        job = _Job(prompt, kwargs)
+        self._queue.put(job)
+        INFERENCE_QUEUE_DEPTH.inc()
+        self._ensure_thread()
+        return job.future
+
+    def generate(self, prompt: str, **kwargs: Any) -> str:
+        return self.submit(prompt, **kwargs).result()
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> str:
+        return await asyncio.wrap_future(self.submit(prompt, **kwargs))
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> List[_Job]:
+        first = self._held.pop(0) if self._held else self._queue.get()
+        batch, key = [first], _kwargs_key(first.kwargs)
+        # held jobs were already waiting: take any that match before reading the queue
+        for job in list(self._held):
+            if len(batch) >= self.max_batch:
+                break
+            if _kwargs_key(job.kwargs) == key:
+                self._held.remove(job)
+                batch.append(job)
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if _kwargs_key(job.kwargs) == key:
+                batch.append(job)
+            else:
+                self._held.append(job)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            INFERENCE_QUEUE_DEPTH.dec(len(batch))
+            started = time.monotonic()
+            for job in batch:
+                INFERENCE_LATENCY.labels("queue").observe(started - job.enqueued)
+            INFERENCE_BATCH_SIZE.observe(len(batch))
+            try:
+                outputs = llm.generate([job.prompt for job in batch], batch_size=len(batch), **batch[0].kwargs)
+            except Exception as exc:
+                logger.exception("Generation batch of %d failed", len(batch))
+                for job in batch:
+                    job.future.set_exception(exc)
+                continue
+            finished = time.monotonic()
+            INFERENCE_LATENCY.labels("generate").observe(finished - started)
+            for job, text in zip(batch, outputs):
+                INFERENCE_LATENCY.labels("total").observe(finished - job.enqueued)
+                job.future.set_result(text)
+
+
+def _kwargs_key(kwargs: Dict[str, Any]) -> Tuple:
+    return tuple(sorted(kwargs.items()))
+
+
+scheduler = BatchScheduler(settings.inference_max_batch, settings.inference_max_wait_ms / 1000)
+_stream_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _slots() -> asyncio.Semaphore:
+    # built inside the running loop: on Python < 3.10 a semaphore binds to the
+    # loop current at construction and fails under contention on any other
+    loop = asyncio.get_running_loop()
+    if loop not in _stream_slots:
+        _stream_slots[loop] = asyncio.Semaphore(settings.inference_max_streams)
+    return _stream_slots[loop]
+
+
+async def stream_generate(
+    prompt: str, is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None, **kwargs: Any,
+) -> AsyncIterator[str]:
+    """
+    Yield the completion of ``prompt`` as it is decoded. ``is_disconnected``
+    (e.g. ``request.is_disconnected``) is polled between pieces; generation is
+    cancelled as soon as it returns true or the consumer stops iterating.
+    """
+    cancel = threading.Event()
+    enqueued = time.monotonic()
+    async with _slots():
+        INFERENCE_LATENCY.labels("queue").observe(time.monotonic() - enqueued)
+        first = True
+        try:
+            async for piece in iterate_in_threadpool(llm.registry.stream(prompt, cancel, **kwargs)):
+                if is_disconnected is not None and await is_disconnected():
+                    INFERENCE_STREAMS_CANCELLED.inc()
+                    return
+                if not piece:
+                    continue
+                if first:
+                    INFERENCE_LATENCY.labels("first_token").observe(time.monotonic() - enqueued)
+                    first = False
+                yield piece
+        finally:
+            cancel.set()
+        INFERENCE_LATENCY.labels("total").observe(time.monotonic() - enqueued)
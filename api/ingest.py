@@ -0,0 +1,146 @@
+"""
+Streaming parsing and batched inserts for ``POST /resources/bulk``.
+
+The body (NDJSON or a JSON array of objects) is decoded incrementally as it
+arrives, each record is validated on its own, and valid records are written
+in batches of ``settings.bulk_batch_size`` per transaction.
+"""
+import codecs
+import json
+from typing import Any, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from api.change_journal import UPSERT, record_changes
+from api.models import ResourceModel
+from api.schemas import ResourceCreate
+from api.solr_client import resource_to_doc
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class MalformedBody(ValueError):
+    pass
+
+
+class RecordStream:
+    """
+    Incremental decoder for NDJSON or a JSON array. ``feed`` returns the
+    records completed by a chunk as ``(index, object)``; an object that is not
+    valid JSON comes back as a ``ValueError`` so the caller can report it.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._array = None  # decided by the first non-whitespace character
+        self._closed = False
+        self._count = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Tuple[int, Any]]:
+        self._buffer += self._text.decode(chunk, final=final)
+        if self._array is None:
+            stripped = self._buffer.lstrip(_WHITESPACE)
+            if not stripped:
+                return []
+            self._array = stripped.startswith("[")
+            self._buffer = stripped[1:] if self._array else stripped
+        records = self._array_records(final) if self._array else self._ndjson_records(final)
+        if final and self._array and not self._closed:
+            raise MalformedBody("JSON array is not terminated")
+        return records
+
+    def _next(self, value) -> Tuple[int, Any]:
+        self._count += 1
+        return self._count - 1, value
+
+    def _ndjson_records(self, final: bool) -> List[Tuple[int, Any]]:
+        lines = self._buffer.split("\n")
+        self._buffer = "" if final else lines.pop()
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(self._next(json.loads(line)))
+            except ValueError as exc:
+                records.append(self._next(ValueError(f"Invalid JSON: {exc}")))
+        return records
+
+    def _array_records(self, final: bool) -> List[Tuple[int, Any]]:
+        records, pos, text = [], 0, self._buffer
+        while not self._closed:
+            while pos < len(text) and (text[pos] in _WHITESPACE or (text[pos] == "," and self._count)):
+                pos += 1
+            if pos == len(text):
+                break
+            if text[pos] == "]":
+                self._closed = True
+                pos += 1
+                break
+            # objects end in '}', so wait for one before attempting a (re)parse of a large record
+            if "}" not in text[pos:]:
+                break
+            try:
+                value, pos = _decoder.raw_decode(text, pos)
+            except ValueError:
+                if final:
+                    raise MalformedBody(f"Malformed JSON near record {self._count}")
+                break
+            records.append(self._next(value))
+        self._buffer = text[pos:]
+        if self._closed and self._buffer.strip(_WHITESPACE):
+            raise MalformedBody("Unexpected data after JSON array")
+        return records
+
+
+def validate_record(value: Any) -> dict:
+    """Column values for a record, or raise ``ValueError`` with a readable message."""
+    if isinstance(value, ValueError):
+        raise value
+    try:
+        data = ResourceCreate.model_validate(value).model_dump(exclude_unset=True)
+    except ValidationError as exc:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()
+        ))
+    if data.get("url") is not None:
+        data["url"] = str(data["url"])
+    return data
+
+
+def _insert(db: Session, rows: List[dict]) -> List[ResourceModel]:
+    resources = list(db.scalars(insert(ResourceModel).returning(ResourceModel), rows))
+    record_changes(db, [resource.id for resource in resources], UPSERT)
+    return resources
+
+
+def insert_batch(db: Session, batch: List[Tuple[int, dict]]) -> Tuple[List[dict], List[dict]]:
+    """
+    Insert a batch in one transaction and journal it. If the batch violates a
+    constraint (e.g. a duplicate DOI), fall back to one savepoint per record
+    so only the offending records are rejected. Returns ``(solr docs, errors)``.
+    """
+    try:
+        resources = _insert(db, [row for _, row in batch])
+        # build docs before commit expires the instances
+        docs = [resource_to_doc(resource) for resource in resources]
+        db.commit()
+        return docs, []
+    except IntegrityError:
+        db.rollback()
+
+    docs, errors = [], []
+    for index, row in batch:
+        try:
+            with db.begin_nested():
+                resources = _insert(db, [row])
+            docs.append(resource_to_doc(resources[0]))
+        except IntegrityError as exc:
+            errors.append({"index": index, "error": str(exc.orig)})
+    db.commit()
+    return docs, errors
@@ -0,0 +1,240 @@
+"""
+Process-wide registry for the local text-generation model.
+
+Nothing is loaded at import time: the model is built on first use (or by
+:meth:`ModelRegistry.start_warmup` during startup, which ``/readyz`` waits
+for) and then shared by every router in the process. With
+``settings.llm_worker`` enabled, generation runs in a local worker process
+owned by each API process instead, so the API process itself never holds
+the weights. Each API worker starts its own, so N API workers still load N
+copies of the model. If the worker process dies (say, OOM-killed), the call
+fails, ``/readyz`` reports the error and a fresh worker is started.
+
+Routers call :func:`generate` with a list of prompts and get a list of
+strings back, or iterate :meth:`ModelRegistry.stream` to get the text of one
+prompt as it is decoded.
+"""
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Any, Dict, Iterator, List, Optional
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _build_pipeline(model: str, max_length: int):
+    # transformers (and torch) are imported here so `import api.main` stays cheap
+    from transformers import pipeline
+
+    logger.info("Loading text-generation model %s", model)
+    return pipeline(
+        task="text2text-generation",
+        model=model,
+        tokenizer=model,
+        max_length=max_length,
+        do_sample=False,
+    )
+
+
+def _stop_when(cancel: threading.Event):
+    from transformers import StoppingCriteria
+
+    class _Cancelled(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            import torch
+
+            return torch.full((input_ids.shape[0],), cancel.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    return _Cancelled()
+
+
+def _run_pipeline(pipe, prompts: List[str], **kwargs: Any) -> List[str]:
+    outputs = pipe(prompts, **kwargs)
+    return [out[0]["generated_text"] if isinstance(out, list) else out["generated_text"] for out in outputs]
+
+
+# --- worker process side ---------------------------------------------------
+_worker_pipe = None
+
+
+def _worker_init(model: str, max_length: int) -> None:
+    global _worker_pipe
+    _worker_pipe = _build_pipeline(model, max_length)
+
+
+def _worker_generate(prompts: List[str], kwargs: Dict[str, Any]) -> List[str]:
+    return _run_pipeline(_worker_pipe, prompts, **kwargs)
+
+
+def _worker_ping() -> bool:
+    return _worker_pipe is not None
+
+
+# --- API process side ------------------------------------------------------
+class ModelRegistry:
+    def __init__(self, model: str, max_length: int, use_worker: bool = False):
+        self.model = model
+        self.max_length = max_length
+        self.use_worker = use_worker
+        self._pipe = None
+        self._tokenizer = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def pipeline(self):
+        """The in-process pipeline, loaded once on first use."""
+        if self._pipe is None:
+            with self._lock:
+                if self._pipe is None:
+                    self._pipe = _build_pipeline(self.model, self.max_length)
+                    self._ready.set()
+        return self._pipe
+
+    def tokenizer(self):
+        """
+        The model's tokenizer, for budgeting prompts. Always its own instance
+        (small), never the pipeline's: fast tokenizers keep truncation state
+        on the shared object, so generation calls and budgeting calls must not
+        reconfigure each other mid-request. It also keeps worker mode from
+        pulling the weights into the API process.
+        """
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    from transformers import AutoTokenizer
+
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.model)
+        return self._tokenizer
+
+    def _worker(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn: never fork a process that already runs threads
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=1,
+                        mp_context=get_context("spawn"),
+                        initializer=_worker_init,
+                        initargs=(self.model, self.max_length),
+                    )
+        return self._pool
+
+    def generate(self, prompts: List[str], **kwargs: Any) -> List[str]:
+        """Generate one completion per prompt."""
+        if not prompts:
+            return []
+        if self.use_worker:
+            pool = self._worker()
+            try:
+                result = pool.submit(_worker_generate, list(prompts), kwargs).result()
+            except BrokenProcessPool as exc:
+                self._worker_died(pool, exc)
+                raise
+            self._ready.set()
+            return result
+        return _run_pipeline(self.pipeline(), list(prompts), **kwargs)
+
+    def stream(self, prompt: str, cancel: threading.Event, **kwargs: Any) -> Iterator[str]:
+        """
+        Yield the completion of ``prompt`` piece by piece as it is decoded.
+        Generation stops at the next step once ``cancel`` is set. In worker
+        mode the text comes back in one piece, since tokens cannot be
+        streamed out of the worker process.
+        """
+        if self.use_worker:
+            yield from self.generate([prompt], **kwargs)
+            return
+        from transformers import StoppingCriteriaList, TextIteratorStreamer
+
+        pipe = self.pipeline()
+        streamer = TextIteratorStreamer(pipe.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        # no truncation: assemble_prompt already fits the prompt to the budget, and
+        # asking for it would reconfigure the tokenizer the batch scheduler shares
+        inputs = pipe.tokenizer(prompt, return_tensors="pt")
+        failure: List[BaseException] = []
+
+        def run() -> None:
+            try:
+                pipe.model.generate(
+                    **inputs.to(pipe.model.device),
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_stop_when(cancel)]),
+                    max_length=self.max_length,
+                    do_sample=False,
+                    **kwargs,
+                )
+            except BaseException as exc:
+                failure.append(exc)
+                streamer.end()  # release the consumer
+
+        thread = threading.Thread(target=run, name="llm-stream", daemon=True)
+        thread.start()
+        try:
+            yield from streamer
+        finally:
+            cancel.set()
+        if failure:
+            raise failure[0]
+
+    def _worker_died(self, pool: ProcessPoolExecutor, exc: BaseException) -> None:
+        """Drop a broken worker pool, report it through /readyz and start a new one."""
+        with self._lock:
+            if self._pool is not pool:
+                return  # another caller already replaced it
+            self._pool = None
+            self._ready.clear()
+            self._error = exc
+        logger.error("Model worker process died; restarting it")
+        pool.shutdown(wait=False)
+        self.start_warmup()
+
+    def _warm(self) -> None:
+        try:
+            if self.use_worker:
+                pool = self._worker()
+                try:
+                    pool.submit(_worker_ping).result()
+                except BrokenProcessPool:
+                    with self._lock:
+                        if self._pool is pool:
+                            self._pool = None  # rebuilt on next use
+                    raise
+                self.tokenizer()
+                self._ready.set()
+            else:
+                self.pipeline()
+            self._error = None
+        except BaseException as exc:  # surfaced through /readyz
+            self._error = exc
+            logger.exception("Model warm-up failed")
+
+    def start_warmup(self) -> threading.Thread:
+        """Load the model in the background; :meth:`ready` turns true when done."""
+        thread = threading.Thread(target=self._warm, name="llm-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._error
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+registry = ModelRegistry(settings.llm_model, settings.llm_max_length, use_worker=settings.llm_worker)
+
+
+def generate(prompts: List[str], **kwargs: Any) -> List[str]:
+    return registry.generate(prompts, **kwargs)
@@ -1,16 +1,38 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.routers.resources import router as resources_router
 from api.routers.exhibits import router as exhibits_router
 from api.routers.search import router as search_router
 from api.routers.summary import router as summary_router
+from api.routers.agent import target as agent_router
 from api.graphql_router import graphql_app
+from api.indexing_queue import indexer
+from api.config import settings
+from api.llm import registry as llm_registry
+from api.solr_transport import close_async_client
 
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi import Response
+from fastapi.responses import JSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.llm_warmup:
+        llm_registry.start_warmup()
+    yield
+    llm_registry.close()
+    # flush queued Solr writes before the worker exits
+    await run_in_threadpool(indexer.drain)
+    await close_async_client()
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Digital Library of Integral Ecology API",
     version="0.3.0",
     description="API for the DLIE project",
@@ -33,6 +55,7 @@ app.include_router(resources_router)
 app.include_router(exhibits_router)
 app.include_router(search_router)
 app.include_router(summary_router)
+app.include_router(agent_router)
 
 # GraphQL endpoint
 app.include_router(graphql_app, prefix="/graphql")
@@ -46,7 +69,10 @@ def healthz():
 
 @app.get("/readyz", tags=["observability"])
 def readyz():
-    """Readiness endpoint."""
+    """Readiness endpoint; waits for the model when LLM_WARMUP is on, or after it failed."""
+    if (settings.llm_warmup or llm_registry.error) and not llm_registry.ready():
+        status = "error" if llm_registry.error else "loading"
+        return JSONResponse({"status": status}, status_code=503)
     return {"status": "ok"}
 
 
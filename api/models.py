@@ -1,6 +1,6 @@
 # api/models.py
 
-from sqlalchemy import Column, Integer, String, Date, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, func
 from sqlalchemy.types import JSON
 from api.database import Base
 
@@ -15,11 +15,23 @@ class ResourceModel(Base):
     date = Column(Date, nullable=False)
     authors = Column(JSON, nullable=False)      # list of author names
     abstract = Column(Text, nullable=False)
-    doi = Column(String, nullable=True)
+    doi = Column(String, nullable=True, unique=True)
     url = Column(String, nullable=True)
     keywords = Column(JSON, nullable=False)     # list of keywords
     provider = Column(String, nullable=False)
     fulltext = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True)  # sha256 of loaded content, for idempotent upserts
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+
+class ResourceChangeModel(Base):
+    """Outbox of resource writes not yet pushed to Solr (see api/change_journal.py)."""
+    __tablename__ = "resource_changes"
+
+    id = Column(Integer, primary_key=True)
+    resource_id = Column(Integer, nullable=False, index=True)
+    op = Column(String(8), nullable=False)      # 'upsert' or 'delete'
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
 
 class ExhibitModel(Base):
@@ -0,0 +1,45 @@
+"""
+Opaque cursor tokens for keyset pagination.
+
+A cursor is URL-safe base64 of a small JSON object (for resource listings,
+the last ``id`` served). Clients should treat it as opaque and only pass
+back what the previous page returned.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    raw = json.dumps(position, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def after_id(cursor: Optional[str]) -> Optional[int]:
+    """The last id served according to ``cursor``, or ``None`` for the first page."""
+    if not cursor:
+        return None
+    last_id = decode_cursor(cursor).get("id")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def next_id_cursor(items, page_size: int) -> Optional[str]:
+    """Cursor for the page after ``items``, or ``None`` when it was the last page."""
+    if len(items) < page_size:
+        return None
+    return encode_cursor({"id": items[-1].id})
@@ -0,0 +1,50 @@
+"""
+Query building for user-entered keyword searches.
+
+User text is escaped and sent through edismax, so it goes through the
+``text_general`` analysis chain (tokenizing, stemming, stopwords) instead
+of being matched as leading-wildcard terms. Prefix and substring matches
+come from the n-gram fields declared in ``solr_config/schema.xml``, which
+are built at index time, so query cost no longer grows with the size of
+the vocabulary.
+"""
+import re
+from typing import Any, Dict
+
+# field boosts: exact analyzed matches dominate, n-gram matches only lift recall
+KEYWORD_QF = "title^5 abstract^2 fulltext^0.5 title_prefix^2 abstract_prefix^0.5 title_substring^0.3"
+KEYWORD_PF = "title^10 abstract^4"
+# all terms required for short queries, 75% for longer ones
+KEYWORD_MM = "3<75%"
+
+_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+_OPERATORS = re.compile(r"\b(AND|OR|NOT)\b")
+
+
+def escape_query(text: str) -> str:
+    """Escape Lucene syntax so user text is always treated as plain terms."""
+    escaped = _SPECIAL.sub(r"\\\1", text.strip())
+    # lowercase bare boolean operators so edismax does not interpret them
+    return _OPERATORS.sub(lambda m: m.group(1).lower(), escaped)
+
+
+def keyword_query(query: str) -> Dict[str, Any]:
+    """
+    Solr params for a keyword search; an empty query matches everything.
+    """
+    text = escape_query(query or "")
+    if not text:
+        return {"q": "*:*"}
+    return {
+        "defType": "edismax",
+        "q": text,
+        "qf": KEYWORD_QF,
+        "pf": KEYWORD_PF,
+        "mm": KEYWORD_MM,
+        "q.alt": "*:*",
+    }
+
+
+def legacy_wildcard_query(query: str) -> Dict[str, Any]:
+    """The previous leading-wildcard form, kept for benchmarking only."""
+    return {"q": f"title:*{query}* OR abstract:*{query}*"}
@@ -0,0 +1,77 @@
+"""
+Row counts for the ``/resources`` listing without a full scan per request.
+
+Strategies:
+
+* ``exact``     – ``count(id)`` on every call.
+* ``cached``    – the exact count, kept per worker for
+  ``settings.resource_count_ttl`` seconds and dropped on API writes.
+* ``estimated`` – the Postgres planner estimate (``pg_class.reltuples``);
+  falls back to ``cached`` on other databases or before the first ANALYZE.
+* ``none``      – no total at all.
+"""
+import threading
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from api.models import ResourceModel
+
+STRATEGIES = ("exact", "cached", "estimated", "none")
+
+_lock = threading.Lock()
+_cached: Optional[Tuple[float, int]] = None  # (expires, count)
+
+
+def invalidate() -> None:
+    """Forget the cached count; the next ``cached`` request recounts."""
+    global _cached
+    with _lock:
+        _cached = None
+
+
+def _exact(db: Session) -> int:
+    return db.scalar(select(func.count(ResourceModel.id)))
+
+
+def _cached_exact(db: Session) -> int:
+    global _cached
+    with _lock:
+        entry = _cached
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    count = _exact(db)
+    with _lock:
+        _cached = (time.monotonic() + settings.resource_count_ttl, count)
+    return count
+
+
+def _estimate(db: Session) -> Optional[int]:
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = db.scalar(text(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"
+    ), {"table": ResourceModel.__tablename__})
+    # -1 (PG14+) or 0 until the table has been vacuumed/analyzed
+    if estimate is None or estimate <= 0:
+        return None
+    return int(estimate)
+
+
+def count_resources(db: Session, strategy: Optional[str] = None) -> Tuple[Optional[int], bool]:
+    """
+    Return ``(total, is_estimate)`` for ``strategy`` (default from settings).
+    """
+    strategy = strategy or settings.resource_count_strategy
+    if strategy == "none":
+        return None, False
+    if strategy == "exact":
+        return _exact(db), False
+    if strategy == "estimated":
+        estimate = _estimate(db)
+        if estimate is not None:
+            return estimate, True
+    return _cached_exact(db), False
@@ -1,28 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from api.solr_client import search_resources, semantic_search_resources
-from langchain.llms import HuggingFacePipeline
-from transformers import pipeline
+from api.context import assemble_prompt
+from api.dependencies import get_db
+from api.inference import scheduler, stream_generate
+from api.routers.summary import load_contexts
+from api.solr_client import async_semantic_search_resources
+from api.sse import event_stream
 
 # Initialize the router
 target = APIRouter(prefix="/agents", tags=["agents"])
 
 
-# --------------------------------------------------
-# Local LLM setup using a lightweight FLAN-T5 model
-# --------------------------------------------------
-gen_pipeline = pipeline(
-    task="text2text-generation",
-    model="google/flan-t5-small",
-    tokenizer="google/flan-t5-small",
-    max_length=512,
-    do_sample=False,
-)
-llm = HuggingFacePipeline(pipeline=gen_pipeline)
-
-
 # --------------------------
 # Request & Response Models
 # --------------------------
@@ -48,58 +40,71 @@ class QAResponse(BaseModel):
 # Summary Endpoint
 # --------------------------
 @target.post("/summary", response_model=SummaryResponse)
-def summarize_docs(req: SummaryRequest):
+async def summarize_docs(req: SummaryRequest, db: Session = Depends(get_db)):
     """
     Retrieve specified documents, extract text, and generate a combined summary.
     """
-    # Fetch docs by ID
-    id_filter = " OR ".join(req.document_ids)
-    q = f"id:({id_filter})"
-    solr_res = search_resources(q=q, page=1, page_size=len(req.document_ids), facet_fields=[])
-    docs = solr_res.get("response", {}).get("docs", [])
-    if not docs:
+    # Fetch abstracts by ID
+    _, contexts = await run_in_threadpool(load_contexts, db, req.document_ids)
+    if not contexts:
         raise HTTPException(status_code=404, detail="No documents found for provided IDs.")
 
-    # Aggregate abstracts or fulltext for context
-    contexts = [doc.get("abstract", "") for doc in docs]
-    prompt = (
-        "Summarize the following documents in an academic tone:\n\n"
-        + "\n\n".join(contexts)
+    # Fit the abstracts to the model's budget (map-reduce if needed)
+    prompt = await assemble_prompt(
+        "Summarize the following documents in an academic tone:\n\n", contexts, scheduler.agenerate,
     )
 
     # Generate summary
-    summary = llm(prompt)
+    summary = await scheduler.agenerate(prompt)
     return SummaryResponse(summary=summary)
 
 
 # --------------------------
 # Q&A Endpoint
 # --------------------------
-@target.post("/qa", response_model=QAResponse)
-def answer_question(req: QARequest):
-    """
-    Perform semantic retrieval to gather context and answer the user question.
-    """
+async def build_qa_prompt(req: QARequest, db: Session) -> str:
     # Retrieve top-K semantically similar passages
-    solr_res = semantic_search_resources(
+    solr_res = await async_semantic_search_resources(
         query=req.question,
         top_k=req.top_k,
         filters=None,
         page=1,
         page_size=req.top_k,
     )
-    docs = solr_res.get("response", {}).get("docs", [])
-    if not docs:
+    document_ids = [str(doc["id"]) for doc in solr_res.get("items", [])]
+    ids, abstracts = await run_in_threadpool(load_contexts, db, document_ids)
+    # load_contexts sorts by id; keep Solr's semantic ranking instead
+    by_id = dict(zip(ids, abstracts))
+    contexts = [by_id[rid] for rid in document_ids if rid in by_id]
+    if not contexts:
         raise HTTPException(status_code=404, detail="No context found for question.")
 
-    # Build context string
-    contexts = [doc.get("abstract", "") for doc in docs]
-    prompt = (
-        "Use the following contexts to answer the question:\n\n"
-        + "\n\n".join(contexts)
-        + f"\n\nQuestion: {req.question}\nAnswer:"
+    # Keep the best kNN hits within the budget: no query, so the order is not re-ranked
+    return await assemble_prompt(
+        "Use the following contexts to answer the question:\n\n",
+        contexts,
+        scheduler.agenerate,
+        footer=f"\n\nQuestion: {req.question}\nAnswer:",
     )
 
+
+@target.post("/qa", response_model=QAResponse)
+async def answer_question(req: QARequest, db: Session = Depends(get_db)):
+    """
+    Perform semantic retrieval to gather context and answer the user question.
+    """
+    prompt = await build_qa_prompt(req, db)
+
     # Generate answer
-    answer = llm(prompt)
+    answer = await scheduler.agenerate(prompt)
     return QAResponse(answer=answer)
+
+
+@target.post("/qa/stream")
+async def stream_answer(req: QARequest, request: Request, db: Session = Depends(get_db)):
+    """
+    The same answer as server-sent events, sent as the model decodes it.
+    Generation stops when the client disconnects.
+    """
+    prompt = await build_qa_prompt(req, db)
+    return event_stream(stream_generate(prompt, request.is_disconnected))
@@ -1,16 +1,69 @@
 """
 Endpoints for exhibits.
 """
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+import json
+from typing import Any, Dict, Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from prometheus_client import Counter
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from api.config import settings
 from api.dependencies import get_db
-from api.models import ExhibitModel
-from api.schemas import ExhibitSummary, ExhibitRead
+from api.models import ExhibitModel, ResourceModel
+from api.schemas import ExhibitExpanded, ExhibitResource, ExhibitSummary, ExhibitRead
+from api.search_cache import LocalCache
 
 router = APIRouter(prefix="/exhibits", tags=["exhibits"])
 
+# everything an exhibit page shows; fulltext is deliberately left out
+EXHIBIT_RESOURCE_COLUMNS = [getattr(ResourceModel, name) for name in ExhibitResource.model_fields]
+
+EXHIBIT_CACHE_EVICTIONS = Counter("exhibit_cache_evictions_total", "Expanded exhibit cache evictions", ["reason"])
+
+# assembled payloads; keys carry the exhibit and resource versions, so entries never go stale
+_expanded_cache = LocalCache(settings.exhibit_cache_size, settings.exhibit_cache_ttl, evictions=EXHIBIT_CACHE_EVICTIONS)
+
+
+def _expanded_key(exhibit: ExhibitModel, versions) -> str:
+    state = {
+        "exhibit": [exhibit.slug, exhibit.title, exhibit.narrative, exhibit.resources],
+        "resources": [[rid, str(updated)] for rid, updated in versions],
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def expand_exhibit(db: Session, exhibit: ExhibitModel) -> Dict[str, Any]:
+    """
+    The exhibit with its resources in narrative order, fetched in one
+    projected query. A cheap ``(id, updated_at)`` lookup decides whether the
+    cached payload is still current.
+    """
+    ids = [int(rid) for rid in exhibit.resources or []]
+    versions = db.execute(
+        select(ResourceModel.id, ResourceModel.updated_at)
+        .where(ResourceModel.id.in_(ids))
+        .order_by(ResourceModel.id)
+    ).all() if ids else []
+    key = _expanded_key(exhibit, versions)
+    payload = _expanded_cache.get(key)
+    if payload is not None:
+        return payload
+
+    rows = db.execute(select(*EXHIBIT_RESOURCE_COLUMNS).where(ResourceModel.id.in_(ids))).all() if ids else []
+    by_id = {row.id: ExhibitResource.model_validate(row._mapping).model_dump(mode="json") for row in rows}
+    payload = {
+        "slug": exhibit.slug,
+        "title": exhibit.title,
+        "narrative": exhibit.narrative,
+        # ids whose resource has been deleted are dropped
+        "resources": [by_id[rid] for rid in ids if rid in by_id],
+    }
+    _expanded_cache.set(key, payload)
+    return payload
+
 
 @router.get("", response_model=list[ExhibitSummary])
 def list_exhibits(db: Session = Depends(get_db)):
@@ -18,9 +71,15 @@ def list_exhibits(db: Session = Depends(get_db)):
     return db.execute(stmt).scalars().all()
 
 
-@router.get("/{slug}", response_model=ExhibitRead)
-def read_exhibit(slug: str, db: Session = Depends(get_db)):
+@router.get("/{slug}", response_model=Union[ExhibitExpanded, ExhibitRead])
+def read_exhibit(
+    slug: str,
+    expand: Optional[Literal["resources"]] = Query(None, description="`resources` embeds the resource records"),
+    db: Session = Depends(get_db),
+):
     exhibit = db.get(ExhibitModel, slug)
     if not exhibit:
         raise HTTPException(status_code=404, detail="Exhibit not found")
+    if expand == "resources":
+        return expand_exhibit(db, exhibit)
     return exhibit
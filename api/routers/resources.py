@@ -1,48 +1,167 @@
 """
 CRUD operations for resources.
 """
-from fastapi import APIRouter, Depends, Query, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy.orm import Session, defer
+from typing import List, Literal, Optional, Union
 
+from api import resource_count
+from api.change_journal import DELETE, UPSERT, record_change
 from api.dependencies import get_db
+from api.indexing_queue import indexer
+from api.ingest import MalformedBody, RecordStream, insert_batch, validate_record
+from api.fulltext import (
+    RangeNotSatisfiable, accepts_gzip, fulltext_info, gzip_stream, iter_fulltext, parse_range, version_tag,
+)
 from api.models import ResourceModel
-from api.schemas import ResourceList, ResourceCreate, ResourceRead
-from api.solr_client import index_resources, delete_resource
+from api.pagination import after_id, next_id_cursor
+from api.config import settings
+from api.schemas import BulkIngestResult, ResourceList, ResourceListItem, ResourceCreate, ResourceRead
+from api.solr_client import resource_to_doc
 
 router = APIRouter(prefix="/resources", tags=["resources"])
 
+# columns a list page returns by default; fulltext must be asked for explicitly
+LIST_FIELDS = ("title", "resource_type", "date", "authors", "abstract", "doi", "url", "keywords", "provider")
+SELECTABLE_FIELDS = LIST_FIELDS + ("fulltext",)
 
-@router.get("", response_model=ResourceList)
+
+def _list_columns(fields: Optional[str]) -> List:
+    """
+    Columns for a list query: ``id`` plus the default summary set (with the
+    abstract truncated in SQL), or exactly the comma-separated ``fields``.
+    """
+    if not fields:
+        columns = [getattr(ResourceModel, name) for name in LIST_FIELDS if name != "abstract"]
+        columns.append(func.substr(ResourceModel.abstract, 1, settings.list_abstract_chars).label("abstract"))
+        return [ResourceModel.id] + columns
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SELECTABLE_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return [ResourceModel.id] + [getattr(ResourceModel, name) for name in dict.fromkeys(names)]
+
+
+def _list_items(db: Session, stmt) -> List[ResourceListItem]:
+    return [ResourceListItem.model_validate(dict(row._mapping)) for row in db.execute(stmt)]
+
+
+@router.get("", response_model=ResourceList, response_model_exclude_unset=True)
 def list_resources(
     limit: Optional[int] = Query(None, ge=1),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque `next_cursor` from a previous page; overrides `page`"),
+    count: Optional[Literal["exact", "cached", "estimated", "none"]] = Query(
+        None, description="How to compute `total`; defaults to the server's RESOURCE_COUNT_STRATEGY",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated columns to return instead of the summary set, e.g. `title,fulltext`",
+    ),
     db: Session = Depends(get_db),
 ):
-    total = db.scalar(select(func.count(ResourceModel.id)))
+    columns = _list_columns(fields)
+    total, estimated = resource_count.count_resources(db, count)
     if limit is not None:
-        stmt = select(ResourceModel).order_by(ResourceModel.id.desc()).limit(limit)
-        items = db.execute(stmt).scalars().all()
-        return ResourceList(total=total, page=1, page_size=limit, items=items)
-    stmt = select(ResourceModel).offset((page-1)*page_size).limit(page_size)
-    items = db.execute(stmt).scalars().all()
-    return ResourceList(total=total, page=page, page_size=page_size, items=items)
+        stmt = select(*columns).order_by(ResourceModel.id.desc()).limit(limit)
+        items = _list_items(db, stmt)
+        return ResourceList(
+            total=total, total_is_estimate=estimated, page=1, page_size=limit, items=items, next_cursor=None,
+        )
+    stmt = select(*columns).order_by(ResourceModel.id).limit(page_size)
+    if cursor:
+        # keyset: seek past the last id served instead of scanning OFFSET rows
+        try:
+            last_id = after_id(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(ResourceModel.id > last_id)
+    else:
+        stmt = stmt.offset((page-1)*page_size)
+    items = _list_items(db, stmt)
+    return ResourceList(
+        total=total, total_is_estimate=estimated, page=page, page_size=page_size, items=items,
+        next_cursor=next_id_cursor(items, page_size),
+    )
 
 
-@router.get("/{resource_id}", response_model=ResourceRead)
-def get_resource(resource_id: int, db: Session = Depends(get_db)):
-    resource = db.get(ResourceModel, resource_id)
+@router.get(
+    "/{resource_id}", response_model=Union[ResourceRead, ResourceListItem], response_model_exclude_unset=True,
+)
+def get_resource(
+    resource_id: int,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated columns to return instead of the full record (without `fulltext`)",
+    ),
+    db: Session = Depends(get_db),
+):
+    if fields:
+        # exactly the requested columns, validated like the list endpoint's
+        row = db.execute(select(*_list_columns(fields)).where(ResourceModel.id == resource_id)).one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Resource not found")
+        return ResourceListItem.model_validate(dict(row._mapping))
+    resource = db.get(ResourceModel, resource_id, options=[defer(ResourceModel.fulltext)])
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
-    return resource
+    # built from loaded attributes only, so the deferred column is never fetched
+    return ResourceRead.model_validate({name: getattr(resource, name) for name in ("id",) + LIST_FIELDS})
+
+
+@router.get("/{resource_id}/fulltext", response_class=StreamingResponse)
+def stream_fulltext(resource_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Stream the extracted text as UTF-8, read from the database in chunks.
+    Supports single byte ranges (``Range``/``If-Range``), ``ETag`` /
+    ``If-None-Match`` and gzip for full (non-range) downloads.
+    """
+    info = fulltext_info(db, resource_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    updated_at, length = info
+    if length is None:
+        raise HTTPException(status_code=404, detail="Resource has no fulltext")
+
+    version = version_tag(resource_id, updated_at, length)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != f'"{version}"':
+        range_header = None  # the client's partial copy is stale; send everything
+    try:
+        byte_range = parse_range(range_header, length)
+    except RangeNotSatisfiable:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{length}"})
+    gzipped = byte_range is None and accepts_gzip(request.headers.get("accept-encoding"))
+
+    # the gzip representation gets its own validator
+    etag = f'"{version}-gz"' if gzipped else f'"{version}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Vary": "Accept-Encoding"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    media_type = "text/plain; charset=utf-8"
+    engine = db.get_bind()
+    if byte_range is not None:
+        start, end = byte_range
+        headers.update({"Content-Range": f"bytes {start}-{end}/{length}", "Content-Length": str(end - start + 1)})
+        return StreamingResponse(
+            iter_fulltext(engine, resource_id, start, end), status_code=206, media_type=media_type, headers=headers,
+        )
+
+    chunks = iter_fulltext(engine, resource_id, 0, length - 1)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(gzip_stream(chunks), media_type=media_type, headers=headers)
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
 
 
 @router.post("", response_model=ResourceRead, status_code=201)
 def create_resource(
     resource_in: ResourceCreate,
-    background: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     resource_data = resource_in.dict(exclude_unset=True)
@@ -50,31 +169,74 @@ def create_resource(
     if 'url' in resource_data and resource_data['url'] is not None:
         resource_data['url'] = str(resource_data['url'])
 
-    resource = ResourceModel(**resource_in)
+    resource = ResourceModel(**resource_data)
     db.add(resource)
+    db.flush()
+    # journaled in the same transaction so a write the indexer loses is caught by the delta sync
+    record_change(db, resource.id, UPSERT)
     db.commit()
+    resource_count.invalidate()
     db.refresh(resource)
-    doc = {
-        "id": str(resource.id),
-        "title": resource.title,
-        "resource_type": resource.resource_type,
-        "abstract": resource.abstract,
-        "authors": resource.authors,
-        "date": resource.date.isoformat(),
-        "provider": resource.provider,
-        "keywords": resource.keywords,
-        "fulltext": resource.fulltext or "",
-        "url": resource.url or "",
-    }
-    background.add_task(index_resources, doc)
+    indexer.submit([resource_to_doc(resource)])
     return resource
 
 
+@router.post("/bulk", response_model=BulkIngestResult)
+async def bulk_create_resources(request: Request, db: Session = Depends(get_db)):
+    """
+    Create many resources from an NDJSON or JSON-array body.
+
+    Records are validated as the body streams in and inserted in
+    transactions of BULK_BATCH_SIZE; invalid records are reported by index
+    without failing the rest. New documents go to the coalescing indexer.
+    """
+    stream = RecordStream()
+    result = {"received": 0, "created": 0, "failed": 0, "errors": []}
+    batch = []
+
+    def fail(index, message):
+        result["failed"] += 1
+        if len(result["errors"]) < settings.bulk_max_errors:
+            result["errors"].append({"index": index, "error": message})
+
+    async def write(batch):
+        docs, errors = await run_in_threadpool(insert_batch, db, batch)
+        result["created"] += len(docs)
+        for error in errors:
+            fail(error["index"], error["error"])
+        # submit can wait for room when Solr is behind; keep that off the event loop
+        await run_in_threadpool(indexer.submit, docs)
+
+    async def chunks():
+        async for chunk in request.stream():
+            yield chunk, False
+        yield b"", True
+
+    try:
+        async for chunk, final in chunks():
+            for index, value in stream.feed(chunk, final=final):
+                result["received"] += 1
+                try:
+                    batch.append((index, validate_record(value)))
+                except ValueError as exc:
+                    fail(index, str(exc))
+                if len(batch) >= settings.bulk_batch_size:
+                    await write(batch)
+                    batch = []
+    except MalformedBody as exc:
+        # batches already written stay committed; report where parsing stopped
+        fail(result["received"], str(exc))
+    if batch:
+        await write(batch)
+    if result["created"]:
+        resource_count.invalidate()
+    return result
+
+
 @router.put("/{resource_id}", response_model=ResourceRead)
 def update_resource(
     resource_id: int,
     resource_in: ResourceCreate,
-    background: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     resource = db.get(ResourceModel, resource_id)
@@ -82,33 +244,23 @@ def update_resource(
         raise HTTPException(status_code=404, detail="Resource not found")
     for field, value in resource_in.dict().items():
         setattr(resource, field, value)
+    record_change(db, resource.id, UPSERT)
     db.commit()
     db.refresh(resource)
-    doc = {
-        "id": str(resource.id),
-        "title": resource.title,
-        "resource_type": resource.resource_type,
-        "abstract": resource.abstract,
-        "authors": resource.authors,
-        "date": resource.date.isoformat(),
-        "provider": resource.provider,
-        "keywords": resource.keywords,
-        "fulltext": resource.fulltext or "",
-        "url": resource.url or "",
-    }
-    background.add_task(index_resources, doc)
+    indexer.submit([resource_to_doc(resource)])
     return resource
 
 
 @router.delete("/{resource_id}", status_code=204)
 def delete_resource_endpoint(
     resource_id: int,
-    background: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     resource = db.get(ResourceModel, resource_id)
     if resource:
         db.delete(resource)
+        record_change(db, resource_id, DELETE)
         db.commit()
-        background.add_task(delete_resource, resource_id)
+        resource_count.invalidate()
+        indexer.submit_delete([resource_id])
     return None
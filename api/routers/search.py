@@ -1,35 +1,39 @@
 """
 Search endpoint for Solr-backed queries, now with keyword, semantic, and vector search.
 """
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 
+from api.query_builder import keyword_query
 from api.schemas import SearchResponse, SemanticSearchRequest, VectorSearchRequest
 from api.solr_client import (
-    search_resources,
-    semantic_search_resources,
-    vector_search_resources,
+    InvalidCursor,
+    async_search_resources,
+    async_semantic_search_resources,
+    async_vector_search_resources,
 )
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 
 @router.get("/", response_model=SearchResponse)
-def keyword_search(
+async def keyword_search(
     query: str = Query("", alias="query"),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     resource_type: Optional[str] = Query(None),
     provider: Optional[str] = Query(None),
     keywords: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = Query(None, description="`*` to start cursor paging, then each `next_cursor`"),
 ):
     """
     Classic keyword and faceted search via Solr `/select`.
     If query is empty, returns all records.
+    Use `page` for shallow pages and `cursor` to walk deep result sets.
     """
     # Facet on resource_type (not reserved 'type'), provider, and keywords
     facets = ["resource_type", "provider", "keywords"]
-    qstr = "*:*" if not query else f"title:*{query}* OR abstract:*{query}*"
+    query_params = keyword_query(query)
     filters = {}
     if resource_type:
         filters['resource_type'] = resource_type
@@ -38,21 +42,26 @@ def keyword_search(
     if keywords:
         filters['keywords'] = keywords
 
-    return search_resources(
-        q=qstr,
-        page=page,
-        page_size=page_size,
-        facet_fields=facets,
-        filters=filters,
-    )
+    try:
+        return await async_search_resources(
+            q=query_params.pop("q"),
+            page=page,
+            page_size=page_size,
+            facet_fields=facets,
+            filters=filters,
+            extra_params=query_params,
+            cursor=cursor,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.post("/semantic", response_model=SearchResponse)
-def semantic_search(req: SemanticSearchRequest):
+async def semantic_search(req: SemanticSearchRequest):
     """
     On-the-fly semantic search using Solr `knn_text_to_vector`.
     """
-    return semantic_search_resources(
+    return await async_semantic_search_resources(
         query=req.query,
         top_k=req.top_k,
         filters=req.filters,
@@ -62,12 +71,12 @@ def semantic_search(req: SemanticSearchRequest):
 
 
 @router.post("/vector", response_model=SearchResponse)
-def vector_search(req: VectorSearchRequest):
+async def vector_search(req: VectorSearchRequest):
     """
     Precomputed-vector search hitting Solr `/knn` with `emb_vector`.
     """
     print("DEBUG request JSON:", req)
-    return vector_search_resources(
+    return await async_vector_search_resources(
         vector=req.vector,
         top_k=req.top_k,
         filters=req.filters,
@@ -1,27 +1,23 @@
 # routers/summary.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Optional
-
-from api.solr_client import semantic_search_resources, search_resources
-# from langchain_community.llms import HuggingFacePipeline
-from langchain_huggingface import HuggingFacePipeline
-from transformers import pipeline
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+
+from api.config import settings
+from api.context import assemble_prompt
+from api.dependencies import get_db
+from api.inference import scheduler, stream_generate
+from api.models import ResourceModel
+from api.solr_client import async_semantic_search_resources
+from api.sse import event_stream
+from api.summary_cache import summaries, summary_key
 
 router = APIRouter(prefix="/summary", tags=["summary"])
 
 
-# Initialize a local LLM for summaries
-gen_pipeline = pipeline(
-    task="text2text-generation",
-    model="google/flan-t5-small",
-    tokenizer="google/flan-t5-small",
-    max_length=512,
-    do_sample=False,
-)
-llm = HuggingFacePipeline(pipeline=gen_pipeline)
-
-
 # --- Pydantic Schemas ---
 class SummaryRequest(BaseModel):
     """
@@ -35,41 +31,98 @@ class SummaryRequest(BaseModel):
 
 class SummaryResponse(BaseModel):
     summary: str
+    cached: bool = False
 
 
 # --- Helper to build prompt templates ---
-def build_prompt(contexts: List[str], summary_type: str) -> str:
+def prompt_header(summary_type: str) -> str:
     if summary_type == "chapter":
-        header = "Provide an academic-style chapter summary for the following contexts:\n\n"
-    else:
-        header = "Provide key takeaways in bullet points for the following contexts:\n\n"
-    return header + "\n\n".join(contexts)
+        return "Provide an academic-style chapter summary for the following contexts:\n\n"
+    return "Provide key takeaways in bullet points for the following contexts:\n\n"
 
 
-# --- Endpoint ---
-@router.post("/", response_model=SummaryResponse)
-def generate_summary(req: SummaryRequest):
-    # Validate input
+# --- Context lookup ---
+def load_contexts(db: Session, document_ids: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Abstracts for ``document_ids`` from the database (Solr results do not carry
+    them), in id order so the same set always yields the same prompt and
+    cache key. Returns ``(found ids, abstracts)``.
+    """
+    ids = [int(rid) for rid in document_ids if str(rid).isdigit()]
+    rows = db.execute(select(ResourceModel.id, ResourceModel.abstract).where(ResourceModel.id.in_(ids))).all()
+    by_id = {row.id: row.abstract or "" for row in rows}
+    found = sorted(by_id)
+    return [str(rid) for rid in found], [by_id[rid] for rid in found]
+
+
+# --- Shared request handling ---
+async def resolve_contexts(req: SummaryRequest, db: Session) -> Tuple[str, List[str], Optional[str]]:
+    """
+    Validate ``req`` and return its cache key, the abstracts to summarize and
+    the query to rank them by (``None`` keeps the given order).
+    """
     if not req.topic and not req.document_ids:
         raise HTTPException(status_code=400, detail="Provide either 'topic' or 'document_ids'.")
 
-    # Retrieve contexts via semantic search
+    # Resolve the document set: given ids, or the top semantic matches for the topic
     if req.document_ids:
-        # join IDs for an ID-based query
-        q = "id:(" + " OR ".join(req.document_ids) + ")"
-        solr_res = search_resources(q=q, page=1, page_size=len(req.document_ids), facet_fields=[])
-        docs = solr_res.get("items", [])
-        contexts = [d.get("abstract", "") for d in docs]
+        ids, contexts = await run_in_threadpool(load_contexts, db, req.document_ids)
+        query = req.topic
     else:
-        solr_res = semantic_search_resources(query=req.topic, top_k=req.top_k, filters=None, page=1, page_size=req.top_k)
-        docs = solr_res.get("items", [])
-        contexts = [d.get("abstract", "") for d in docs]
-
+        solr_res = await async_semantic_search_resources(query=req.topic, top_k=req.top_k, filters=None, page=1, page_size=req.top_k)
+        document_ids = [str(d["id"]) for d in solr_res.get("items", [])]
+        ids, abstracts = await run_in_threadpool(load_contexts, db, document_ids)
+        # load_contexts sorts by id; keep Solr's semantic ranking and do not re-rank it
+        by_id = dict(zip(ids, abstracts))
+        contexts = [by_id[rid] for rid in document_ids if rid in by_id]
+        query = None
     if not contexts:
         raise HTTPException(status_code=404, detail="No context found for summary.")
 
-    # Build and run prompt
-    prompt = build_prompt(contexts, req.summary_type)
-    output = llm(prompt)
+    # Same documents, text, type, topic, budget and model: same key
+    key = summary_key(
+        ids, contexts, req.summary_type, settings.llm_model, topic=req.topic,
+        prompt_options={"context_tokens": settings.llm_context_tokens, "map_reduce": settings.llm_map_reduce},
+    )
+    return key, contexts, query
+
+
+# --- Endpoints ---
+@router.post("/", response_model=SummaryResponse)
+async def generate_summary(req: SummaryRequest, db: Session = Depends(get_db)):
+    key, contexts, query = await resolve_contexts(req, db)
+    cached = await run_in_threadpool(summaries.get, key)
+    if cached is not None:
+        return SummaryResponse(summary=cached, cached=True)
+
+    # Fit the contexts to the model's budget (map-reduce if needed), then generate
+    prompt = await assemble_prompt(prompt_header(req.summary_type), contexts, scheduler.agenerate, query=query)
+    output = await scheduler.agenerate(prompt)
+    await run_in_threadpool(summaries.set, key, output)
 
     return SummaryResponse(summary=output)
+
+
+@router.post("/stream")
+async def stream_summary(req: SummaryRequest, request: Request, db: Session = Depends(get_db)):
+    """
+    The same summary as server-sent events, sent as the model decodes it. A
+    cached summary arrives as a single event. Generation stops when the
+    client disconnects; only complete summaries are cached.
+    """
+    key, contexts, query = await resolve_contexts(req, db)
+    cached = await run_in_threadpool(summaries.get, key)
+
+    async def pieces():
+        if cached is not None:
+            yield cached
+            return
+        prompt = await assemble_prompt(prompt_header(req.summary_type), contexts, scheduler.agenerate, query=query)
+        output = []
+        async for piece in stream_generate(prompt, request.is_disconnected):
+            output.append(piece)
+            yield piece
+        if not await request.is_disconnected():
+            await run_in_threadpool(summaries.set, key, "".join(output))
+
+    return event_stream(pieces())
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import List, Optional, Dict, Any
+import datetime
 from datetime import date
 
 
@@ -31,16 +32,53 @@ class ResourceRead(ResourceBase):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
 
+class ResourceListItem(BaseModel):
+    """
+    Projected resource for list pages. Only the selected columns are set
+    (and serialized); ``fulltext`` only appears when asked for with ``fields=``.
+    """
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    id: int
+    title: Optional[str] = None
+    resource_type: Optional[str] = Field(None, alias='type')
+    date: Optional[datetime.date] = None  # bare `date` would resolve to this field's default
+    authors: Optional[List[str]] = None
+    abstract: Optional[str] = None
+    doi: Optional[str] = None
+    url: Optional[str] = None
+    keywords: Optional[List[str]] = None
+    provider: Optional[str] = None
+    fulltext: Optional[str] = None
+
+
 class ResourceList(BaseModel):
     """Envelope for paginated or limited resource lists."""
-    total: int
+    # None when the client asked for count=none
+    total: Optional[int] = None
+    # True when total is the planner's estimate rather than an exact count
+    total_is_estimate: bool = False
     page: int
     page_size: int
-    items: List[ResourceRead]
+    items: List[ResourceListItem]
+    # pass back as ?cursor= to fetch the next page by keyset; None on the last page
+    next_cursor: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
 
+class BulkError(BaseModel):
+    index: int  # position of the record in the request body
+    error: str
+
+
+class BulkIngestResult(BaseModel):
+    """Outcome of ``POST /resources/bulk``."""
+    received: int
+    created: int
+    failed: int
+    errors: List[BulkError]  # the first BULK_MAX_ERRORS failures
+
+
 class ResourceSummary(BaseModel):
     id: str
     title: str
@@ -70,6 +108,32 @@ class ExhibitRead(ExhibitSummary):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ExhibitResource(BaseModel):
+    """Resource as embedded in an expanded exhibit (no fulltext)."""
+    id: int
+    title: str
+    resource_type: str
+    date: date
+    authors: List[str]
+    abstract: str
+    doi: Optional[str] = None
+    url: Optional[str] = None
+    keywords: List[str]
+    provider: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ExhibitExpanded(BaseModel):
+    """Exhibit with its resources resolved (``?expand=resources``)."""
+    slug: str
+    title: str
+    narrative: str
+    resources: List[ExhibitResource]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # --------------------------
 # Facet & Search Schemas
 # --------------------------
@@ -85,6 +149,8 @@ class SearchResponse(BaseModel):
     total: int
     page_size: int
     facets: Dict[str, List[FacetOption]]
+    # Solr cursorMark for the next page when the request used ?cursor=
+    next_cursor: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# api/scripts/bench_search.py
+"""
+Compare keyword-search latency of the edismax query path against the old
+leading-wildcard form, straight against Solr (the result cache is bypassed).
+
+    python -m api.scripts.bench_search --rounds 50
+    python -m api.scripts.bench_search --terms soil "urban agriculture" biodiv
+"""
+import argparse
+import statistics
+import time
+
+from api.query_builder import keyword_query, legacy_wildcard_query
+from api.solr_transport import solr_request
+
+DEFAULT_TERMS = [
+    "ecology", "soil", "urban agriculture", "climate", "biodiversity",
+    "citizen science", "litigation", "food system", "ecol", "divers",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run(build, terms, rounds):
+    """Time ``rounds`` passes over ``terms``; returns latencies in ms and hit counts."""
+    latencies, hits = [], 0
+    for _ in range(rounds):
+        for term in terms:
+            params = {"rows": 10, "wt": "json", **build(term)}
+            started = time.perf_counter()
+            resp = solr_request("GET", "select", params=params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += resp.json().get("response", {}).get("numFound", 0)
+    return latencies, hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", nargs="+", default=DEFAULT_TERMS)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2, help="untimed rounds to warm Solr caches")
+    args = parser.parse_args(argv)
+
+    forms = [("wildcard", legacy_wildcard_query), ("edismax", keyword_query)]
+    for _, build in forms:
+        run(build, args.terms, args.warmup)
+
+    print(f"{'form':<10} {'queries':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'hits':>10}")
+    for name, build in forms:
+        latencies, hits = run(build, args.terms, args.rounds)
+        print(
+            f"{name:<10} {len(latencies):>8} {percentile(latencies, 50):>8.1f} "
+            f"{percentile(latencies, 99):>8.1f} {statistics.mean(latencies):>8.1f} {hits:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,180 @@
 #!/usr/bin/env python3
 # api/scripts/reindex.py
+"""
+Rebuild the Solr index from the resources table.
 
-import math
-from sqlalchemy import create_engine, MetaData, select, func
+Rows are read with keyset pagination on ``id`` (constant cost per batch) and
+up to ``--workers`` batches are in flight to Solr at once. Batches are sent
+without committing; one commit is issued at the end, or Solr commits on its
+own when ``--commit-within`` is given. Resources the journal records as
+deleted are removed from Solr before the journal is cleared, since a
+rebuild only adds documents.
+
+``--delta`` instead drains the ``resource_changes`` journal (see
+api/change_journal.py): only rows written since the last sync are
+re-indexed, deleted rows are removed from Solr, and the drained journal
+entries are dropped.
+
+    python -m api.scripts.reindex --batch-size 500 --workers 4
+    python -m api.scripts.reindex --delta
+"""
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from sqlalchemy import create_engine, delete, MetaData, select, func
+from api.change_journal import DELETE
 from api.config import settings
-from api.solr_client import index_resources
-
-# 1) Set up the DB engine and reflect only the 'resources' table
-engine = create_engine(settings.database_url)
-metadata = MetaData()
-metadata.reflect(bind=engine, only=['resources'])
-resources_tbl = metadata.tables['resources']
-
-# 2) Calculate total rows and batch info
-BATCH_SIZE = 200
-with engine.connect() as conn:
-    total = conn.execute(select(func.count()).select_from(resources_tbl)).scalar_one()
-batches = math.ceil(total / BATCH_SIZE)
-print(f"Reindexing {total} resources in {batches} batches…")
-
-# 3) Iterate through batches and index
-with engine.connect() as conn:
-    for batch_num in range(batches):
-        offset = batch_num * BATCH_SIZE
-        stmt = select(resources_tbl).offset(offset).limit(BATCH_SIZE)
-        result = conn.execute(stmt)
-        rows = result.mappings().all()
-
-        docs = []
-        for row in rows:
-            doc = {
-                "id":            str(row["id"]),
-                "title":         row.get("title", ""),
-            # Map the DB column 'type' to Solr field 'resource_type'
-            "resource_type": row.get("type", ""),
-                "date":          row.get("date").isoformat() + "Z" if row.get("date") else "",
-                "authors":       row.get("authors") or [],
-                "abstract":      row.get("abstract") or "",
-                "doi":           row.get("doi") or "",
-                "url":           row.get("url") or "",
-                "keywords":      row.get("keywords") or [],
-                "provider":      row.get("provider") or "",
-                "fulltext":      row.get("fulltext") or "",
-            }
-            docs.append(doc)
-
-        print(f"  🗂  Batch {batch_num+1}/{batches}: indexing {len(docs)} docs...")
-        index_resources(docs)
-        print("    ✅ Done.")
-
-print("🎉 Reindex complete!")
+from api.solr_client import commit_index, delete_resources, index_resources, resource_to_doc
+
+BATCH_SIZE = int(os.getenv("REINDEX_BATCH_SIZE", "500"))
+WORKERS = int(os.getenv("REINDEX_WORKERS", "4"))
+
+
+def iter_batches(conn, resources_tbl, batch_size):
+    """Yield lists of row mappings ordered by id, one keyset page at a time."""
+    last_id = None
+    while True:
+        stmt = select(resources_tbl).order_by(resources_tbl.c.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(resources_tbl.c.id > last_id)
+        rows = conn.execute(stmt).mappings().all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+
+
+def _reflect(engine, *names):
+    metadata = MetaData()
+    metadata.reflect(bind=engine, only=list(names))
+    return [metadata.tables[name] for name in names]
+
+
+def reindex(engine, batch_size=BATCH_SIZE, workers=WORKERS, commit_within=None):
+    """Index every resource; returns the number of documents sent."""
+    resources_tbl, changes_tbl = _reflect(engine, 'resources', 'resource_changes')
+
+    with engine.connect() as conn:
+        total = conn.execute(select(func.count()).select_from(resources_tbl)).scalar_one()
+        # journal entries up to here are covered by this full rebuild
+        journaled = conn.execute(select(func.max(changes_tbl.c.id))).scalar()
+    print(f"Reindexing {total} resources in batches of {batch_size} with {workers} workers…")
+
+    sent = 0
+    started = time.monotonic()
+    in_flight = set()
+
+    def settle(futures):
+        nonlocal sent
+        for future in futures:
+            sent += future.result()  # re-raises a failed batch
+        rate = sent / (time.monotonic() - started or 1e-9)
+        print(f"  🗂  {sent}/{total} docs indexed ({rate:.0f} docs/s)")
+
+    def submit(docs):
+        index_resources(docs, commit=False, commit_within=commit_within)
+        return len(docs)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, engine.connect() as conn:
+        for rows in iter_batches(conn, resources_tbl, batch_size):
+            if len(in_flight) >= workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                settle(done)
+            in_flight.add(pool.submit(submit, [resource_to_doc(row) for row in rows]))
+        settle(wait(in_flight).done)
+
+    deleted = 0
+    if journaled is not None:
+        # a rebuild only adds documents: replay journaled deletes (the indexer may
+        # have dropped them) before the journal entries that record them go
+        with engine.connect() as conn:
+            gone = conn.execute(
+                select(changes_tbl.c.resource_id).distinct()
+                .where(changes_tbl.c.id <= journaled)
+                .where(changes_tbl.c.resource_id.not_in(select(resources_tbl.c.id)))
+            ).scalars().all()
+        for start in range(0, len(gone), batch_size):
+            delete_resources(gone[start:start + batch_size], commit=False, commit_within=commit_within)
+        deleted = len(gone)
+        if deleted:
+            print(f"  🗑  {deleted} deleted resources removed")
+
+    if commit_within is None:
+        print("  💾 Committing…")
+        commit_index()
+    if journaled is not None:
+        with engine.begin() as conn:
+            conn.execute(delete(changes_tbl).where(changes_tbl.c.id <= journaled))
+    elapsed = time.monotonic() - started
+    print(f"🎉 Reindex complete! {sent} docs in {elapsed:.1f}s ({sent / (elapsed or 1e-9):.0f} docs/s)")
+    return sent
+
+
+def delta_reindex(engine, batch_size=BATCH_SIZE, commit_within=None):
+    """
+    Push journaled changes to Solr; returns ``(indexed, deleted)``.
+
+    Entries are drained oldest first in batches. For each batch only the last
+    operation per resource matters; a journaled upsert whose row has since
+    disappeared becomes a delete. Entries are removed once Solr accepted the
+    batch, so a failed run is simply retried by the next one.
+    """
+    resources_tbl, changes_tbl = _reflect(engine, 'resources', 'resource_changes')
+    indexed = deleted = 0
+    started = time.monotonic()
+    while True:
+        with engine.connect() as conn:
+            changes = conn.execute(
+                select(changes_tbl.c.id, changes_tbl.c.resource_id, changes_tbl.c.op)
+                .order_by(changes_tbl.c.id)
+                .limit(batch_size)
+            ).all()
+            if not changes:
+                break
+            latest = {}
+            for change in changes:
+                latest[change.resource_id] = change.op
+            upsert_ids = [rid for rid, op in latest.items() if op != DELETE]
+            rows = conn.execute(
+                select(resources_tbl).where(resources_tbl.c.id.in_(upsert_ids))
+            ).mappings().all() if upsert_ids else []
+        docs = [resource_to_doc(row) for row in rows]
+        found = {row["id"] for row in rows}
+        gone = [rid for rid in latest if rid not in found]
+        if docs:
+            index_resources(docs, commit=False, commit_within=commit_within)
+        delete_resources(gone, commit=False, commit_within=commit_within)
+        with engine.begin() as conn:
+            # drop exactly what was read: a concurrent writer may commit a lower id late
+            conn.execute(delete(changes_tbl).where(changes_tbl.c.id.in_([c.id for c in changes])))
+        indexed += len(docs)
+        deleted += len(gone)
+        print(f"  🗂  {indexed} docs indexed, {deleted} deleted")
+    if (indexed or deleted) and commit_within is None:
+        commit_index()
+    elapsed = time.monotonic() - started
+    print(f"🎉 Delta sync complete! {indexed} indexed, {deleted} deleted in {elapsed:.1f}s")
+    return indexed, deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="batches in flight to Solr")
+    parser.add_argument(
+        "--commit-within", type=int, default=None, metavar="MS",
+        help="let Solr commit within MS milliseconds instead of one hard commit at the end",
+    )
+    parser.add_argument("--delta", action="store_true", help="only push changes journaled since the last sync")
+    args = parser.parse_args(argv)
+    engine = create_engine(settings.database_url)
+    if args.delta:
+        delta_reindex(engine, batch_size=args.batch_size, commit_within=args.commit_within)
+    else:
+        reindex(engine, batch_size=args.batch_size, workers=args.workers, commit_within=args.commit_within)
+
+
+if __name__ == "__main__":
+    main()
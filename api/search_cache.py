@@ -0,0 +1,245 @@
+"""
+Result cache for Solr searches.
+
+Results are cached in-process (LRU with a TTL) and, when
+``settings.search_cache_redis_url`` is set, in a shared Redis-compatible
+store. Keys combine the normalized request with two versions:
+
+* Solr's searcher version (``admin/luke``), which changes whenever a commit
+  makes writes visible, whichever process sent them (API workers, the
+  reindexer, the ETL sync). It is re-read at most every
+  ``settings.search_cache_version_ttl`` seconds, which bounds how long a
+  result can outlive the index it came from.
+* A write counter bumped by this process (and shared through Redis, when
+  configured), so a worker's own writes invalidate at once.
+
+Stale entries are never looked up again and simply age out.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from prometheus_client import Counter
+
+from api.config import settings
+from api.solr_transport import solr_request
+
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = Counter("search_cache_hits_total", "Search cache hits", ["tier"])
+CACHE_MISSES = Counter("search_cache_misses_total", "Search cache misses")
+CACHE_EVICTIONS = Counter("search_cache_evictions_total", "Search cache evictions", ["reason"])
+
+VERSION_KEY = "search:index_version"
+
+
+class LocalCache:
+    """
+    Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+    Evictions are counted in ``evictions`` (a Counter labelled by reason),
+    the search cache's counter unless another is given.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, evictions: Counter = CACHE_EVICTIONS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._evictions = evictions
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self._evictions.labels("expired").inc()
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions.labels("lru").inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """Shared tier; entries expire server-side after ``ttl`` seconds."""
+
+    def __init__(self, url: str, ttl: float):
+        import redis  # optional dependency, only needed for the shared tier
+
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2)
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(f"search:{key}")
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self._client.set(f"search:{key}", json.dumps(value), ex=max(1, int(self.ttl)))
+
+    def version(self) -> int:
+        return int(self._client.get(VERSION_KEY) or 0)
+
+    def bump(self) -> None:
+        self._client.incr(VERSION_KEY)
+
+
+_local = LocalCache(settings.search_cache_size, settings.search_cache_ttl)
+_shared: Optional[RedisCache] = None
+if settings.search_cache_redis_url:
+    try:
+        _shared = RedisCache(settings.search_cache_redis_url, settings.search_cache_ttl)
+    except ImportError:
+        logger.warning("search_cache_redis_url is set but the redis package is not installed")
+_local_version = 0
+_version_lock = threading.Lock()
+_searcher: tuple = (float("-inf"), None)  # (read at, Solr searcher version)
+
+
+def _version() -> int:
+    if _shared is not None:
+        try:
+            return _shared.version()
+        except Exception:
+            logger.exception("Shared search cache unavailable; using local index version")
+    return _local_version
+
+
+def _searcher_fresh() -> bool:
+    return time.monotonic() - _searcher[0] < settings.search_cache_version_ttl
+
+
+def _searcher_version() -> Optional[int]:
+    """Version of Solr's open searcher, re-read once per ``search_cache_version_ttl``."""
+    global _searcher
+    if _searcher_fresh():
+        return _searcher[1]
+    try:
+        resp = solr_request("GET", "admin/luke", params={"numTerms": 0, "show": "index", "wt": "json"})
+        version = resp.json()["index"]["version"]
+    except Exception:
+        logger.exception("Could not read the Solr index version")
+        version = None
+    with _version_lock:
+        _searcher = (time.monotonic(), version)
+    return version
+
+
+def bump_index_version() -> None:
+    """Invalidate every cached result; call after any change to the Solr index."""
+    global _local_version
+    with _version_lock:
+        _local_version += 1
+    if _shared is not None:
+        try:
+            _shared.bump()
+        except Exception:
+            logger.exception("Failed to bump shared search index version")
+
+
+_deferred: Optional[threading.Timer] = None
+_deferred_at = 0.0
+
+
+def bump_index_version_after(delay: float) -> None:
+    """
+    Bump again once ``delay`` seconds have passed, for writes Solr makes
+    visible later (``commitWithin``): a search between the write and that
+    commit would otherwise cache pre-write results under the new version.
+    Pending bumps are coalesced into the latest one.
+    """
+    global _deferred, _deferred_at
+    due = time.monotonic() + delay
+    with _version_lock:
+        if _deferred is not None and _deferred.is_alive():
+            if _deferred_at >= due:
+                return
+            _deferred.cancel()
+        _deferred = threading.Timer(delay, bump_index_version)
+        _deferred.daemon = True
+        _deferred_at = due
+        _deferred.start()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [_normalize(v) for v in value]
+        # fq and facet.field order doesn't change the result
+        return sorted(items, key=json.dumps) if all(isinstance(v, str) for v in items) else items
+    return value
+
+
+def make_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable cache key for a Solr request body/params, tied to the index version."""
+    payload = json.dumps([kind, _searcher_version(), _version(), _normalize(request)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(key: str) -> Optional[Any]:
+    value = _local.get(key)
+    if value is not None:
+        CACHE_HITS.labels("local").inc()
+        return copy.deepcopy(value)
+    if _shared is not None:
+        try:
+            value = _shared.get(key)
+        except Exception:
+            logger.exception("Shared search cache read failed")
+            value = None
+        if value is not None:
+            CACHE_HITS.labels("shared").inc()
+            _local.set(key, value)
+            return copy.deepcopy(value)
+    CACHE_MISSES.inc()
+    return None
+
+
+def store(key: str, value: Any) -> None:
+    _local.set(key, copy.deepcopy(value))
+    if _shared is not None:
+        try:
+            _shared.set(key, value)
+        except Exception:
+            logger.exception("Shared search cache write failed")
+
+
+async def alookup(key: str) -> Optional[Any]:
+    """:func:`lookup` for async handlers; the shared tier is queried off the event loop."""
+    if _shared is None:
+        return lookup(key)
+    return await asyncio.to_thread(lookup, key)
+
+
+async def astore(key: str, value: Any) -> None:
+    if _shared is None:
+        store(key, value)
+    else:
+        await asyncio.to_thread(store, key, value)
+
+
+async def amake_key(kind: str, request: Dict[str, Any]) -> str:
+    if _shared is None and _searcher_fresh():
+        return make_key(kind, request)
+    return await asyncio.to_thread(make_key, kind, request)
@@ -1,27 +1,95 @@
-import requests
+import httpx
 import pysolr
+import requests
+from collections.abc import Mapping
 from typing import Any, Dict, List, Optional, Union
-from api.config import settings
+from api import search_cache
+from api.solr_transport import SOLR_BASE, SOLR_TIMEOUT, async_solr_request, session, solr_request
+
+# cursorMark needs a total order ending on the uniqueKey
+CURSOR_SORT = "score desc, id asc"
+
+
+class InvalidCursor(ValueError):
+    """Solr rejected the ``cursorMark`` a caller passed in."""
+
+
+def _rejected_cursor(response: Any, cursor: Optional[str]) -> bool:
+    # Solr answers a malformed or stale cursorMark with 400
+    return bool(cursor) and response is not None and response.status_code == 400
+
+
+# Pysolr client for basic indexing operations, sharing the pooled transport.
+# No always_commit: callers pass commit/commit_within (API writes go through
+# api/indexing_queue.py), and solrconfig.xml soft-commits on its own.
+_solr = pysolr.Solr(SOLR_BASE, timeout=SOLR_TIMEOUT, session=session)
+
+
+def resource_to_doc(resource: Any) -> Dict[str, Any]:
+    """
+    Map a resources row (ORM object or row mapping) to a Solr document.
+    """
+    if isinstance(resource, Mapping):
+        get = resource.get
+    else:
+        def get(name, default=None):
+            return getattr(resource, name, default)
+    return {
+        "id": str(get("id")),
+        "title": get("title") or "",
+        # rows reflected before the rename migration still carry 'type'
+        "resource_type": get("resource_type") or get("type") or "",
+        # pysolr serializes dates as YYYY-MM-DDT00:00:00Z
+        "date": get("date"),
+        "authors": get("authors") or [],
+        "abstract": get("abstract") or "",
+        "doi": get("doi") or "",
+        "url": get("url") or "",
+        "keywords": get("keywords") or [],
+        "provider": get("provider") or "",
+        "fulltext": get("fulltext") or "",
+    }
 
-# Pysolr client for basic indexing operations
-_solr = pysolr.Solr(str(settings.solr_url), always_commit=True, timeout=10)
 
-# Base URL to call Solr HTTP APIs (assumes settings.solr_url points to core endpoint)
-SOLR_BASE = str(settings.solr_url)
+def _invalidate(commit_within: Optional[int]) -> None:
+    search_cache.bump_index_version()
+    if commit_within is not None:
+        # the write becomes visible up to commit_within ms from now; invalidate again then
+        search_cache.bump_index_version_after(commit_within / 1000)
 
 
-def index_resources(docs: list[dict]):
+def index_resources(docs: list[dict], commit: Optional[bool] = None, commit_within: Optional[int] = None):
     """
     Batch‐index a list of Solr docs.
+
+    ``commit=False`` skips the client's default hard commit, and
+    ``commit_within`` (ms) lets Solr make the batch visible on its own schedule.
     """
-    _solr.add(docs)
+    _solr.add(docs, commit=commit, commitWithin=commit_within)
+    _invalidate(commit_within)
 
 
-def delete_resource(resource_id: int):
+def delete_resources(resource_ids: list[int], commit: Optional[bool] = None, commit_within: Optional[int] = None):
     """
-    Delete a resource by its ID from Solr.
+    Delete several resources from Solr in one request.
     """
-    _solr.delete(id=str(resource_id))
+    if not resource_ids:
+        return
+    ids = [str(rid) for rid in resource_ids]
+    if commit_within is not None:
+        # pysolr's delete() has no commitWithin; Solr accepts it on the update request
+        solr_request("POST", "update", params={"commitWithin": commit_within, "wt": "json"}, json={"delete": ids})
+    else:
+        _solr.delete(id=ids, commit=commit)
+    _invalidate(commit_within)
+
+
+def commit_index(soft: bool = False):
+    """
+    Issue a single explicit commit, e.g. at the end of a bulk reindex.
+    """
+    _solr.commit(softCommit=soft)
+    search_cache.bump_index_version()
 
 
 def _build_fq(filters: Optional[Dict[str, Union[str, List[str]]]] = None) -> List[str]:
@@ -36,7 +104,8 @@ def _build_fq(filters: Optional[Dict[str, Union[str, List[str]]]] = None) -> Lis
         if isinstance(val, str):
             fq.append(f"{field}:{val}")
         elif isinstance(val, list) and all(isinstance(v, str) for v in val):
-            vals = " OR ".join(val)
+            # canonical order keeps equivalent filters on one cache entry (ours and Solr's filterCache)
+            vals = " OR ".join(sorted(val))
             fq.append(f"{field}:(" + vals + ")")
         else:
             # skip unsupported filter types
@@ -58,23 +127,43 @@ def _flatten_string_field(value: Any) -> Optional[str]:
     return value
 
 
-def search_resources(
+def _parse_items(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Map Solr docs onto the ResourceSummary shape."""
+    items = []
+    for doc in data.get("docs", []):
+        title = _flatten_string_field(doc.get("title"))
+        date = _flatten_string_field(doc.get("date"))
+        items.append({
+            "id": doc.get("id"),
+            "title": title,
+            "authors": doc.get("authors", []),
+            "date": date,
+        })
+    return items
+
+
+def _keyword_params(
     q: str,
-    page: int = 1,
-    page_size: int = 10,
-    facet_fields: List[str] = None,
-    facet_limit: int = 10,
-    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    page: int,
+    page_size: int,
+    facet_fields: Optional[List[str]],
+    facet_limit: int,
+    filters: Optional[Dict[str, Union[str, List[str]]]],
+    extra_params: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """
-    Classic keyword/faceted search via Solr `/select`.
-    """
     params: Dict[str, Any] = {
         "q": q or "*:*",
-        "start": (page - 1) * page_size,
         "rows": page_size,
         "wt": "json",
     }
+    if cursor:
+        # deep paging: Solr resumes from the cursor instead of collecting start+rows hits
+        params.update({"cursorMark": cursor, "sort": CURSOR_SORT})
+    else:
+        params["start"] = (page - 1) * page_size
+    if extra_params:
+        params.update(extra_params)
     if facet_fields:
         params.update({
             "facet": "true",
@@ -85,22 +174,16 @@ def search_resources(
     # add filter queries
     for fq in _build_fq(filters):
         params.setdefault("fq", []).append(fq)
+    return params
 
-    resp = requests.get(f"{SOLR_BASE}/select", params=params)
-    resp.raise_for_status()
-    resp_json = resp.json()
-    results = resp_json.get("response", {})
 
-    items = []
-    for doc in results.get("docs", []):
-        title = _flatten_string_field(doc.get("title"))
-        date = _flatten_string_field(doc.get("date"))
-        items.append({
-            "id": doc.get("id"),
-            "title": title,
-            "authors": doc.get("authors", []),
-            "date": date,
-        })
+def _keyword_result(
+    resp_json: Dict[str, Any],
+    page_size: int,
+    facet_fields: Optional[List[str]],
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    results = resp_json.get("response", {})
 
     # parse facets
     facets: Dict[str, List[Dict[str, Union[str, int]]]] = {}
@@ -113,24 +196,21 @@ def search_resources(
                 for i in range(0, len(counts), 2)
             ]
 
+    # Solr hands back the same mark once the result set is exhausted
+    next_cursor = resp_json.get("nextCursorMark")
+    if not cursor or next_cursor == cursor:
+        next_cursor = None
+
     return {
-        "items": items,
+        "items": _parse_items(results),
         "total": results.get("numFound", 0),
         "page_size": page_size,
         "facets": facets,
+        "next_cursor": next_cursor,
     }
 
 
-def semantic_search_resources(
-    query: str,
-    top_k: int = 10,
-    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
-    page: int = 1,
-    page_size: int = 10,
-) -> Dict[str, Any]:
-    """
-    On-the-fly text→vector search (knn_text_to_vector) via `/select`.
-    """
+def _semantic_params(query, top_k, filters, page, page_size) -> Dict[str, Any]:
     params: Dict[str, Any] = {
         "q": "*:*",
         "start": (page - 1) * page_size,
@@ -142,39 +222,10 @@ def semantic_search_resources(
     }
     for fq in _build_fq(filters):
         params.setdefault("fq", []).append(fq)
+    return params
 
-    resp = requests.get(f"{SOLR_BASE}/select", params=params)
-    resp.raise_for_status()
-    resp_json = resp.json()
-    data = resp_json.get("response", {})
 
-    items = []
-    for doc in data.get("docs", []):
-        title = _flatten_string_field(doc.get("title"))
-        date = _flatten_string_field(doc.get("date"))
-        items.append({
-            "id": doc.get("id"),
-            "title": title,
-            "authors": doc.get("authors", []),
-            "date": date,
-        })
-
-    return {"items": items, "total": data.get("numFound", 0), "page_size": page_size, "facets": {}}
-
-
-def vector_search_resources(
-    vector: List[float],
-    top_k: int = 10,
-    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
-    page: int = 1,
-    page_size: int = 10,
-) -> Dict[str, Any]:
-    """
-    Precomputed-vector search via a POST to Solr’s /select using the JSON-request 'knn' block.
-    """
-    url = f"{SOLR_BASE}/select?wt=json"
-
-    # Build the JSON body
+def _vector_body(vector, top_k, filters, page, page_size) -> Dict[str, Any]:
     body: Dict[str, Any] = {
         "query": "*:*",
         "start": (page - 1) * page_size,
@@ -189,29 +240,155 @@ def vector_search_resources(
     # If you have filter queries, add them under "filter" (array of strings)
     if filters:
         body["filter"] = _build_fq(filters)  # e.g. ["provider:peer-reviewed", ...]
+    return body
 
-    resp = requests.post(
-        url,
-        json=body,
-        headers={"Content-Type": "application/json"}
-    )
-    resp.raise_for_status()
-    data = resp.json().get("response", {})
-
-    items = []
-    for doc in data.get("docs", []):
-        title = _flatten_string_field(doc.get("title"))
-        date = _flatten_string_field(doc.get("date"))
-        items.append({
-            "id":  doc.get("id"),
-            "title": title,
-            "authors": doc.get("authors", []),
-            "date": date,
-        })
 
+def _knn_result(resp_json: Dict[str, Any], page_size: int) -> Dict[str, Any]:
+    data = resp_json.get("response", {})
     return {
-        "items": items,
+        "items": _parse_items(data),
         "total": data.get("numFound", 0),
         "page_size": page_size,
         "facets": {},
     }
+
+
+def search_resources(
+    q: str,
+    page: int = 1,
+    page_size: int = 10,
+    facet_fields: List[str] = None,
+    facet_limit: int = 10,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    extra_params: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Classic keyword/faceted search via Solr `/select`.
+
+    ``extra_params`` carries query-parser settings (see api/query_builder.py).
+    ``cursor`` switches from ``page`` to Solr ``cursorMark`` paging; pass
+    ``"*"`` for the first page and then each returned ``next_cursor``. A
+    cursor Solr rejects raises :class:`InvalidCursor`.
+    """
+    params = _keyword_params(q, page, page_size, facet_fields, facet_limit, filters, extra_params, cursor)
+    key = search_cache.make_key("select", params)
+    result = search_cache.lookup(key)
+    if result is None:
+        try:
+            resp = solr_request("GET", "select", params=params)
+        except requests.HTTPError as exc:
+            if _rejected_cursor(exc.response, cursor):
+                raise InvalidCursor(cursor) from exc
+            raise
+        result = _keyword_result(resp.json(), page_size, facet_fields, cursor)
+        search_cache.store(key, result)
+    return result
+
+
+async def async_search_resources(
+    q: str,
+    page: int = 1,
+    page_size: int = 10,
+    facet_fields: List[str] = None,
+    facet_limit: int = 10,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    extra_params: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Non-blocking variant of :func:`search_resources`.
+    """
+    params = _keyword_params(q, page, page_size, facet_fields, facet_limit, filters, extra_params, cursor)
+    key = await search_cache.amake_key("select", params)
+    result = await search_cache.alookup(key)
+    if result is None:
+        try:
+            resp = await async_solr_request("GET", "select", params=params)
+        except httpx.HTTPStatusError as exc:
+            if _rejected_cursor(exc.response, cursor):
+                raise InvalidCursor(cursor) from exc
+            raise
+        result = _keyword_result(resp.json(), page_size, facet_fields, cursor)
+        await search_cache.astore(key, result)
+    return result
+
+
+def semantic_search_resources(
+    query: str,
+    top_k: int = 10,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    page: int = 1,
+    page_size: int = 10,
+) -> Dict[str, Any]:
+    """
+    On-the-fly text→vector search (knn_text_to_vector) via `/select`.
+    """
+    params = _semantic_params(query, top_k, filters, page, page_size)
+    key = search_cache.make_key("select", params)
+    result = search_cache.lookup(key)
+    if result is None:
+        resp = solr_request("GET", "select", params=params)
+        result = _knn_result(resp.json(), page_size)
+        search_cache.store(key, result)
+    return result
+
+
+async def async_semantic_search_resources(
+    query: str,
+    top_k: int = 10,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    page: int = 1,
+    page_size: int = 10,
+) -> Dict[str, Any]:
+    """
+    Non-blocking variant of :func:`semantic_search_resources`.
+    """
+    params = _semantic_params(query, top_k, filters, page, page_size)
+    key = await search_cache.amake_key("select", params)
+    result = await search_cache.alookup(key)
+    if result is None:
+        resp = await async_solr_request("GET", "select", params=params)
+        result = _knn_result(resp.json(), page_size)
+        await search_cache.astore(key, result)
+    return result
+
+
+def vector_search_resources(
+    vector: List[float],
+    top_k: int = 10,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    page: int = 1,
+    page_size: int = 10,
+) -> Dict[str, Any]:
+    """
+    Precomputed-vector search via a POST to Solr’s /select using the JSON-request 'knn' block.
+    """
+    body = _vector_body(vector, top_k, filters, page, page_size)
+    key = search_cache.make_key("knn", body)
+    result = search_cache.lookup(key)
+    if result is None:
+        resp = solr_request("POST", "select", params={"wt": "json"}, json=body)
+        result = _knn_result(resp.json(), page_size)
+        search_cache.store(key, result)
+    return result
+
+
+async def async_vector_search_resources(
+    vector: List[float],
+    top_k: int = 10,
+    filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+    page: int = 1,
+    page_size: int = 10,
+) -> Dict[str, Any]:
+    """
+    Non-blocking variant of :func:`vector_search_resources`.
+    """
+    body = _vector_body(vector, top_k, filters, page, page_size)
+    key = await search_cache.amake_key("knn", body)
+    result = await search_cache.alookup(key)
+    if result is None:
+        resp = await async_solr_request("POST", "select", params={"wt": "json"}, json=body)
+        result = _knn_result(resp.json(), page_size)
+        await search_cache.astore(key, result)
+    return result
@@ -0,0 +1,159 @@
+"""
+Pooled HTTP transport shared by every Solr query and indexing path.
+
+One ``requests.Session`` per worker process keeps connections to Solr alive
+(pool size ``settings.solr_pool_size``), applies connect/read timeouts and
+retries transient failures. The pysolr client used for indexing is built on
+the same session. Async request handlers use an ``httpx.AsyncClient`` with
+the same limits instead, so they never tie up a threadpool slot. Request and
+pool metrics are exported to ``/metrics``.
+"""
+import time
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api.config import settings
+
+SOLR_BASE = str(settings.solr_url).rstrip("/")
+SOLR_TIMEOUT = (settings.solr_connect_timeout, settings.solr_read_timeout)
+
+SOLR_REQUESTS = Counter(
+    "solr_requests_total", "HTTP requests sent to Solr", ["handler", "status"]
+)
+SOLR_LATENCY = Histogram(
+    "solr_request_seconds", "Solr request latency in seconds", ["handler"]
+)
+SOLR_ASYNC_IN_FLIGHT = Gauge(
+    "solr_async_requests_in_flight", "Async Solr requests currently awaiting a response"
+)
+
+
+def _handler(url: str) -> str:
+    """Solr request handler ('select', 'update', ...) a URL targets."""
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1] or "unknown"
+
+
+def _observe(response, *args, **kwargs):
+    handler = _handler(response.url)
+    SOLR_REQUESTS.labels(handler, str(response.status_code)).inc()
+    SOLR_LATENCY.labels(handler).observe(response.elapsed.total_seconds())
+
+
+def build_session() -> requests.Session:
+    """Create the keep-alive session used for all Solr traffic in this process."""
+    retry = Retry(
+        total=settings.solr_retries,
+        backoff_factor=settings.solr_retry_backoff,
+        status_forcelist=[502, 503, 504],
+        # /select is read-only and /update adds overwrite by id, so both are safe to replay
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.solr_pool_size,
+        max_retries=retry,
+        pool_block=False,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_observe)
+    return session
+
+
+session = build_session()
+
+
+def solr_request(method: str, handler: str, **kwargs: Any) -> requests.Response:
+    """
+    Send a request to ``{SOLR_BASE}/{handler}`` over the shared pool.
+    """
+    kwargs.setdefault("timeout", SOLR_TIMEOUT)
+    resp = session.request(method, f"{SOLR_BASE}/{handler}", **kwargs)
+    resp.raise_for_status()
+    return resp
+
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Lazily create the process-wide async client (inside the running event loop)."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.solr_pool_size,
+                max_keepalive_connections=settings.solr_pool_size,
+            ),
+            timeout=httpx.Timeout(settings.solr_read_timeout, connect=settings.solr_connect_timeout),
+            # httpx retries failed connection attempts only; responses are never replayed
+            transport=httpx.AsyncHTTPTransport(retries=settings.solr_retries),
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close pooled async connections; called on application shutdown."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def async_solr_request(method: str, handler: str, **kwargs: Any) -> httpx.Response:
+    """
+    Async counterpart of :func:`solr_request`.
+    """
+    started = time.monotonic()
+    SOLR_ASYNC_IN_FLIGHT.inc()
+    try:
+        resp = await get_async_client().request(method, f"{SOLR_BASE}/{handler}", **kwargs)
+    finally:
+        SOLR_ASYNC_IN_FLIGHT.dec()
+    SOLR_REQUESTS.labels(handler, str(resp.status_code)).inc()
+    SOLR_LATENCY.labels(handler).observe(time.monotonic() - started)
+    resp.raise_for_status()
+    return resp
+
+
+class _PoolCollector:
+    """Expose urllib3 connection-pool state of the shared session."""
+
+    def collect(self):
+        created = GaugeMetricFamily(
+            "solr_pool_connections_created", "Connections opened to Solr by this process"
+        )
+        served = GaugeMetricFamily(
+            "solr_pool_requests", "Requests served by pooled Solr connections"
+        )
+        idle = GaugeMetricFamily("solr_pool_idle_connections", "Idle keep-alive connections to Solr")
+        size = GaugeMetricFamily("solr_pool_max_size", "Maximum pooled connections to Solr")
+        totals = [0, 0, 0]
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                totals[0] += pool.num_connections
+                totals[1] += pool.num_requests
+                # the LIFO queue holds live connections plus None placeholders
+                totals[2] += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        created.add_metric([], totals[0])
+        served.add_metric([], totals[1])
+        idle.add_metric([], totals[2])
+        size.add_metric([], settings.solr_pool_size)
+        return [created, served, idle, size]
+
+
+_collector = _PoolCollector()
+REGISTRY.register(_collector)
@@ -0,0 +1,37 @@
+"""
+Server-sent events for streamed generation.
+
+Each decoded piece is sent as a ``data:`` event; the stream ends with an
+``event: done`` (or ``event: error`` if generation fails once the response
+has started, when a status code can no longer be sent).
+"""
+import logging
+from typing import AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# no-transform/X-Accel-Buffering keep proxies from holding events back
+SSE_HEADERS = {"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    lines = [f"event: {event}"] if event else []
+    lines += [f"data: {line}" for line in data.split("\n")]
+    return "\n".join(lines) + "\n\n"
+
+
+async def _events(pieces: AsyncIterator[str]) -> AsyncIterator[str]:
+    try:
+        async for piece in pieces:
+            yield sse_event(piece)
+    except Exception:
+        logger.exception("Streamed generation failed")
+        yield sse_event("generation failed", event="error")
+        return
+    yield sse_event("", event="done")
+
+
+def event_stream(pieces: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(_events(pieces), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,115 @@
+"""
+Persistent cache of generated summaries.
+
+Entries live in a small SQLite file (``settings.summary_cache_path``), shared
+by every worker that can see it. They survive restarts as long as the path is
+on a volume; docker-compose mounts ``summary_cache`` at ``/cache`` for this,
+otherwise the file lives and dies with the container. The key covers
+everything that determines the output: the sorted resource ids, a hash of
+the text fed to the model, the summary type, the topic, the prompt-budget
+settings and the model id. A changed abstract, a different topic or a model
+swap therefore misses rather than serving something stale. The least
+recently used entries are evicted beyond ``settings.summary_cache_size``.
+The cache is an optimization: a database or filesystem error (say, an
+unwritable path) is logged and the request carries on uncached.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_HITS = Counter("summary_cache_hits_total", "Summary cache hits")
+SUMMARY_CACHE_MISSES = Counter("summary_cache_misses_total", "Summary cache misses")
+
+
+def summary_key(
+    resource_ids: List[str],
+    contexts: List[str],
+    summary_type: str,
+    model: str,
+    topic: Optional[str] = None,
+    prompt_options: Optional[Dict[str, Any]] = None,
+) -> str:
+    content = hashlib.sha256("\x1e".join(contexts).encode()).hexdigest()
+    state = {
+        "ids": sorted(str(rid) for rid in resource_ids), "content": content, "type": summary_type, "model": model,
+        # the topic ranks and trims the passages, so it shapes the prompt too
+        "topic": " ".join(topic.split()) if topic else None,
+        "prompt": prompt_options or {},
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path: str, maxsize: int):
+        self.path = path
+        self.maxsize = maxsize
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " key TEXT PRIMARY KEY, summary TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE summaries SET accessed = ? WHERE key = ?", (time.time(), key))
+        except (sqlite3.Error, OSError):
+            # the cache is an optimization; never fail a request over it
+            logger.exception("Summary cache read failed")
+            row = None
+        if row is None:
+            SUMMARY_CACHE_MISSES.inc()
+            return None
+        SUMMARY_CACHE_HITS.inc()
+        return row[0]
+
+    def set(self, key: str, summary: str) -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, summary, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, summary, now, now),
+                )
+                conn.execute(
+                    "DELETE FROM summaries WHERE key IN ("
+                    " SELECT key FROM summaries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,),
+                )
+        except (sqlite3.Error, OSError):
+            logger.exception("Summary cache write failed")
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM summaries")
+        except (sqlite3.Error, OSError):
+            logger.exception("Summary cache clear failed")
+
+
+summaries = SummaryCache(settings.summary_cache_path, settings.summary_cache_size)
@@ -0,0 +1,85 @@
+"""
+Shared fixtures for the API tests.
+"""
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from api import llm
+from api.database import Base
+from api.dependencies import get_db
+from api.models import ResourceModel
+from api.routers import resources
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A fresh SQLite database with the API schema, usable from any thread."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def seed_resources(db):
+    """Add ``n`` resources titled T0, T1, ...; keyword arguments override column values."""
+    def seed(n, **fields):
+        rows = [
+            ResourceModel(**{
+                "title": f"T{i}", "resource_type": "paper", "date": datetime.date(2020, 1, 1),
+                "authors": [], "abstract": "abs", "keywords": [], "provider": "p", **fields,
+            })
+            for i in range(n)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return rows
+
+    return seed
+
+
+@pytest.fixture
+def client(engine, seed_resources, monkeypatch):
+    seed_resources(3, authors=["A"], abstract="a" * 50, fulltext="x" * 5000)
+
+    def override():
+        with Session(engine) as db:
+            yield db
+
+    monkeypatch.setattr(resources.settings, "list_abstract_chars", 10)
+    app = FastAPI()
+    app.include_router(resources.router)
+    app.dependency_overrides[get_db] = override
+    return TestClient(app)
+
+
+class WordTokenizer:
+    """Stand-in for the model tokenizer: one token per whitespace-separated word."""
+
+    def __init__(self):
+        self.vocab = {}
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [[self.vocab.setdefault(w, len(self.vocab)) for w in t.split()] for t in texts]}
+
+    def decode(self, ids, skip_special_tokens=True):
+        words = {i: w for w, i in self.vocab.items()}
+        return " ".join(words[i] for i in ids)
+
+
+@pytest.fixture
+def tokenizer(monkeypatch):
+    tok = WordTokenizer()
+    monkeypatch.setattr(llm.registry, "tokenizer", lambda: tok)
+    return tok
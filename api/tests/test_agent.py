@@ -0,0 +1,28 @@
+"""
+Tests for the agent QA route's context handling.
+"""
+from api.models import ResourceModel
+from api.routers import agent
+
+
+def test_qa_keeps_semantic_ranking(client, db, tokenizer, monkeypatch):
+    for rid, abstract in [(1, "soil carbon storage"), (2, "unrelated"), (3, "wetland restoration")]:
+        db.get(ResourceModel, rid).abstract = abstract
+    db.commit()
+    prompts = []
+
+    async def fake_search(query, top_k, filters, page, page_size):
+        return {"items": [{"id": "3"}, {"id": "1"}, {"id": "99"}]}
+
+    async def fake_generate(prompt):
+        prompts.append(prompt)
+        return "answer"
+
+    monkeypatch.setattr(agent, "async_semantic_search_resources", fake_search)
+    monkeypatch.setattr(agent.scheduler, "agenerate", fake_generate)
+    client.app.include_router(agent.target)
+
+    response = client.post("/agents/qa", json={"question": "How is soil carbon stored?"})
+    assert response.json() == {"answer": "answer"}
+    # the best kNN hit stays first even though the other shares more words with the question
+    assert prompts[0].index("wetland restoration") < prompts[0].index("soil carbon storage")
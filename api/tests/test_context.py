@@ -0,0 +1,87 @@
+"""
+Tests for token-budgeted prompt assembly.
+"""
+import asyncio
+
+from api import context
+from api.context import ContextAssembler, assemble_prompt, rank_passages
+
+
+def words(n, word):
+    return " ".join([word] * n)
+
+
+def test_rank_passages_by_query_overlap():
+    passages = ["ships and harbours", "railway history", "railway stations and ships"]
+    assert rank_passages(passages, None) == [0, 1, 2]
+    assert rank_passages(passages, "railway ships") == [2, 0, 1]
+
+
+def test_fit_keeps_ranked_passages_and_trims_the_last(tokenizer):
+    assembler = ContextAssembler(tokenizer, budget=60)
+    passages = [words(30, "alpha"), words(10, "beta"), words(40, "gamma")]
+    prompt = assembler.fit("H:", passages, assembler.encode(passages), query="gamma")
+
+    assert prompt.startswith("H:" + words(40, "gamma") + "\n\n" + words(10, "beta"))
+    assert "alpha" not in prompt  # 18 tokens left: too few to trim into, but beta fits
+    assert len(prompt.split()) <= 60
+
+
+def test_assemble_prompt_single_pass_when_it_fits(tokenizer):
+    calls = []
+
+    async def generate(prompt):
+        calls.append(prompt)
+        return "partial"
+
+    prompt = asyncio.run(assemble_prompt("H:", ["one", "two"], generate, footer=" Q?",
+                                         assembler=ContextAssembler(tokenizer, budget=50)))
+    assert prompt == "H:one\n\ntwo Q?"
+    assert calls == []
+
+
+def test_assemble_prompt_map_reduce(tokenizer, monkeypatch):
+    monkeypatch.setattr(context.settings, "llm_map_reduce", True)
+    calls = []
+
+    async def generate(prompt):
+        calls.append(prompt)
+        return f"summary{len(calls)}"
+
+    passages = [words(20, f"p{i}") for i in range(6)]
+    prompt = asyncio.run(assemble_prompt("H:", passages, generate, assembler=ContextAssembler(tokenizer, budget=50)))
+
+    # 120 tokens do not fit 50: chunks of two passages each are summarized, then combined
+    assert len(calls) == 3 and all(c.startswith(context.MAP_HEADER) for c in calls)
+    assert all(len(c.split()) <= 50 for c in calls)
+    assert prompt == "H:summary1\n\nsummary2\n\nsummary3"
+
+
+def test_assemble_prompt_without_map_reduce_trims(tokenizer, monkeypatch):
+    monkeypatch.setattr(context.settings, "llm_map_reduce", False)
+
+    async def generate(prompt):
+        raise AssertionError("map step disabled")
+
+    passages = [words(40, "a"), words(40, "b")]
+    prompt = asyncio.run(assemble_prompt("H:", passages, generate, assembler=ContextAssembler(tokenizer, budget=50)))
+    assert prompt == "H:" + words(40, "a")
+
+
+def test_assemble_prompt_tokenizes_off_the_event_loop(tokenizer, monkeypatch):
+    import threading
+
+    threads = []
+    encode = tokenizer.__class__.__call__
+
+    def recording(self, texts, add_special_tokens=False):
+        threads.append(threading.current_thread())
+        return encode(self, texts, add_special_tokens)
+
+    monkeypatch.setattr(tokenizer.__class__, "__call__", recording)
+
+    async def generate(prompt):
+        return "partial"
+
+    assert asyncio.run(assemble_prompt("H:", ["one"], generate)) == "H:one"
+    assert threads and threading.main_thread() not in threads
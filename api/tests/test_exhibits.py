@@ -0,0 +1,38 @@
+"""
+Tests for expanded exhibit payloads.
+"""
+import datetime
+
+from sqlalchemy import event
+
+from api.models import ExhibitModel, ResourceModel
+from api.routers import exhibits
+
+
+def test_expand_exhibit_batches_and_caches(engine, db, seed_resources):
+    exhibits._expanded_cache.clear()
+    seed_resources(3, fulltext="x" * 1000)
+    exhibit = ExhibitModel(slug="soil", title="Soil", narrative="n", resources=[3, 1, 42])
+    db.add(exhibit)
+    db.commit()
+    db.refresh(exhibit)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    payload = exhibits.expand_exhibit(db, exhibit)
+
+    assert [r["id"] for r in payload["resources"]] == [3, 1]
+    assert "fulltext" not in payload["resources"][0]
+    assert len(statements) == 2 and "fulltext" not in statements[1]
+
+    statements.clear()
+    assert exhibits.expand_exhibit(db, exhibit) is payload
+    assert len(statements) == 1
+
+    # a resource write changes its version and so the cache key
+    resource = db.get(ResourceModel, 1)
+    resource.title = "Renamed"
+    resource.updated_at = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+    db.commit()
+    assert exhibits.expand_exhibit(db, exhibit)["resources"][1]["title"] == "Renamed"
+    exhibits._expanded_cache.clear()
@@ -0,0 +1,48 @@
+"""
+Tests for GraphQL column projection, batching and cost limits.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from api.graphql_router import schema
+
+
+@pytest.fixture
+def statements(engine, seed_resources):
+    seed_resources(3, fulltext="x" * 1000)
+    seen = []
+    event.listen(engine, "before_cursor_execute", lambda *args: seen.append(args[2]))
+    return seen
+
+
+def _run(query, db):
+    return asyncio.run(schema.execute(query, context_value={"db": db, "loaders": {}}))
+
+
+def test_resource_aliases_batch_into_one_projected_query(db, statements):
+    result = _run("""
+        { a: resource(id: 1) { title } b: resource(id: 3) { ...F } c: resource(id: 9) { title } }
+        fragment F on ResourceType { title }
+    """, db)
+
+    assert result.errors is None
+    assert result.data == {"a": {"title": "T0"}, "b": {"title": "T2"}, "c": None}
+    assert len(statements) == 1
+    assert " IN " in statements[0] and "fulltext" not in statements[0]
+
+
+def test_resources_projects_requested_columns(db, statements):
+    result = _run("{ resources(pageSize: 2) { id cursor } }", db)
+
+    assert result.errors is None
+    assert [r["id"] for r in result.data["resources"]] == [1, 2]
+    assert "title" not in statements[0] and "fulltext" not in statements[0]
+
+
+def test_alias_limit_rejects_expensive_queries(db, statements):
+    aliases = " ".join(f"r{i}: resource(id: {i}) {{ id }}" for i in range(50))
+    result = _run("{ %s }" % aliases, db)
+
+    assert result.errors
@@ -0,0 +1,87 @@
+"""
+Tests for the micro-batching inference scheduler.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api import inference
+from api.config import settings
+
+
+def test_concurrent_prompts_share_batches(monkeypatch):
+    batches = []
+    release = threading.Event()
+
+    def fake_generate(prompts, batch_size=None, **kwargs):
+        release.wait(5)
+        batches.append((list(prompts), batch_size, kwargs))
+        return [p.upper() for p in prompts]
+
+    monkeypatch.setattr(inference.llm, "generate", fake_generate)
+    scheduler = inference.BatchScheduler(max_batch=3, max_wait=0.2)
+
+    futures = [scheduler.submit(p) for p in ["a", "b", "c", "d"]]
+    other = scheduler.submit("e", max_new_tokens=5)
+    release.set()
+
+    assert [f.result(5) for f in futures] == ["A", "B", "C", "D"]
+    assert other.result(5) == "E"
+    assert batches[0] == (["a", "b", "c"], 3, {})
+    assert (["e"], 1, {"max_new_tokens": 5}) in batches
+
+
+def test_agenerate_and_failures(monkeypatch):
+    def broken(prompts, batch_size=None, **kwargs):
+        raise RuntimeError("model crashed")
+
+    scheduler = inference.BatchScheduler(max_batch=4, max_wait=0.01)
+    monkeypatch.setattr(inference.llm, "generate", lambda prompts, **kw: [p[::-1] for p in prompts])
+    assert asyncio.run(scheduler.agenerate("abc")) == "cba"
+
+    monkeypatch.setattr(inference.llm, "generate", broken)
+    with pytest.raises(RuntimeError):
+        scheduler.generate("x")
+
+
+def test_stream_generate_stops_when_client_disconnects(monkeypatch):
+    seen = []
+
+    def fake_stream(prompt, cancel, **kwargs):
+        for piece in ["one ", "", "two ", "three "]:
+            if cancel.is_set():
+                return
+            yield piece
+        seen.append("finished")
+
+    polls = iter([False, False, False, True])
+
+    async def is_disconnected():
+        return next(polls)
+
+    async def collect(**kwargs):
+        return [piece async for piece in inference.stream_generate("p", **kwargs)]
+
+    monkeypatch.setattr(inference.llm.registry, "stream", fake_stream)
+    assert asyncio.run(collect()) == ["one ", "two ", "three "]
+    assert seen == ["finished"]
+    assert asyncio.run(collect(is_disconnected=is_disconnected)) == ["one ", "two "]
+    assert seen == ["finished"]
+
+
+def test_stream_slots_work_in_each_event_loop(monkeypatch):
+    def fake_stream(prompt, cancel, **kwargs):
+        time.sleep(0.01)
+        yield prompt
+
+    async def collect_all():
+        async def collect(prompt):
+            return [piece async for piece in inference.stream_generate(prompt)]
+        # more streams than slots, so they contend for the semaphore
+        return await asyncio.gather(*(collect(str(i)) for i in range(settings.inference_max_streams + 2)))
+
+    monkeypatch.setattr(inference.llm.registry, "stream", fake_stream)
+    for _ in range(2):
+        assert asyncio.run(collect_all()) == [[str(i)] for i in range(settings.inference_max_streams + 2)]
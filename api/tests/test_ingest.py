@@ -0,0 +1,119 @@
+"""
+Tests for streaming bulk ingest.
+"""
+import json
+import time
+
+import pytest
+
+from api.ingest import MalformedBody, RecordStream
+from api.routers import resources
+
+
+def _record(i, **extra):
+    return {
+        "title": f"Bulk {i}", "type": "paper", "date": "2021-05-01", "authors": ["A"],
+        "abstract": "abs", "keywords": [], "provider": "partner", **extra,
+    }
+
+
+def _feed_in_pieces(body: bytes, size: int):
+    stream, records = RecordStream(), []
+    for start in range(0, len(body), size):
+        records.extend(stream.feed(body[start:start + size]))
+    records.extend(stream.feed(b"", final=True))
+    return records
+
+
+def test_record_stream_ndjson_and_array():
+    items = [{"a": 1, "s": "é}"}, {"b": [1, 2]}]
+    ndjson = ("\n".join(json.dumps(i, ensure_ascii=False) for i in items) + "\n{oops\n").encode()
+    array = json.dumps(items, ensure_ascii=False).encode()
+
+    parsed = _feed_in_pieces(ndjson, 3)
+    assert [value for _, value in parsed[:2]] == items
+    assert isinstance(parsed[2][1], ValueError)
+    assert _feed_in_pieces(array, 3) == [(0, items[0]), (1, items[1])]
+    with pytest.raises(MalformedBody):
+        _feed_in_pieces(b'[{"a": 1}, {"b": ', 4)
+
+
+def test_bulk_endpoint_batches_and_reports_errors(client, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(resources.indexer, "submit", lambda docs: submitted.append(docs))
+    monkeypatch.setattr(resources.settings, "bulk_batch_size", 2)
+    lines = [
+        _record(0, doi="10.1/x"),
+        _record(1),
+        {"title": "missing fields"},
+        _record(3, doi="10.1/x"),  # duplicate DOI in the same batch as a valid record
+        _record(4),
+    ]
+    body = "\n".join(json.dumps(line) for line in lines)
+
+    result = client.post(
+        "/resources/bulk", content=body, headers={"Content-Type": "application/x-ndjson"},
+    ).json()
+
+    assert (result["received"], result["created"], result["failed"]) == (5, 3, 2)
+    assert [error["index"] for error in result["errors"]] == [2, 3]
+    assert sum(len(docs) for docs in submitted) == 3
+    assert {doc["title"] for docs in submitted for doc in docs} == {"Bulk 0", "Bulk 1", "Bulk 4"}
+
+    listed = client.get("/resources", params={"count": "exact"}).json()
+    assert listed["total"] == 6
+
+
+def test_indexing_queue_coalesces_by_id(monkeypatch):
+    from api import indexing_queue
+
+    sent = []
+    monkeypatch.setattr(
+        indexing_queue, "index_resources",
+        lambda docs, commit=None, commit_within=None: sent.append((docs, commit, commit_within)),
+    )
+    queue = indexing_queue.IndexingQueue(batch_size=2, flush_seconds=60, commit_within=1000)
+    queue._ensure_thread = lambda: None  # flush by hand
+
+    queue.submit([{"id": "1", "title": "old"}, {"id": "2"}, {"id": "3"}])
+    queue.submit([{"id": "1", "title": "new"}])
+
+    assert queue.flush() == 3
+    assert [len(docs) for docs, _, _ in sent] == [2, 1]
+    assert sent[0][0][0] == {"id": "1", "title": "new"}
+    assert all(commit is False and within == 1000 for _, commit, within in sent)
+
+
+def test_indexing_queue_retries_bounds_and_drains(monkeypatch):
+    from api import indexing_queue
+
+    calls, fail = [], [True]
+
+    def add(docs, commit=None, commit_within=None):
+        if fail[0]:
+            raise ConnectionError("solr down")
+        calls.append(("add", [doc["id"] for doc in docs]))
+
+    monkeypatch.setattr(indexing_queue, "index_resources", add)
+    monkeypatch.setattr(
+        indexing_queue, "delete_resources",
+        lambda ids, commit=None, commit_within=None: calls.append(("delete", ids)),
+    )
+    queue = indexing_queue.IndexingQueue(
+        batch_size=10, flush_seconds=60, commit_within=1000, max_pending=3, submit_timeout=0.01,
+    )
+    queue._ensure_thread = lambda: None
+
+    queue.submit([{"id": "1"}, {"id": "2"}])
+    queue.submit_delete([2, 3])
+    queue.submit_timeout = 0.5
+    started = time.monotonic()
+    queue.submit([{"id": str(i)} for i in range(4, 10)])  # buffer is full: dropped, the delta sync replays it
+    assert time.monotonic() - started < 1.0  # one wait for the whole call, not one per document
+    with pytest.raises(ConnectionError):
+        queue.flush()
+    assert len(queue._pending) == 3  # requeued
+
+    fail[0] = False
+    assert queue.drain() == 0
+    assert sorted(calls) == [("add", ["1"]), ("delete", [2, 3])]
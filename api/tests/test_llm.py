@@ -0,0 +1,92 @@
+"""
+Tests for the lazy model registry.
+"""
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import llm
+from api.main import app
+
+
+def _fake_builder(loads):
+    def build(model, max_length):
+        loads.append(model)
+        return lambda prompts, **kwargs: [[{"generated_text": p.upper()}] for p in prompts]
+    return build
+
+
+def test_model_loads_once_on_first_use(monkeypatch):
+    loads = []
+    monkeypatch.setattr(llm, "_build_pipeline", _fake_builder(loads))
+    registry = llm.ModelRegistry("tiny-model", 64)
+
+    assert loads == [] and not registry.ready()
+    assert registry.generate(["a", "b"]) == ["A", "B"]
+    assert registry.generate(["c"]) == ["C"]
+    assert loads == ["tiny-model"] and registry.ready()
+
+
+def test_budget_tokenizer_is_not_the_pipelines(monkeypatch):
+    import transformers
+
+    loads = []
+    monkeypatch.setattr(llm, "_build_pipeline", _fake_builder(loads))
+    monkeypatch.setattr(transformers.AutoTokenizer, "from_pretrained", lambda model: object())
+    registry = llm.ModelRegistry("tiny-model", 64)
+    registry.generate(["a"])
+    registry._pipe.tokenizer = object()
+
+    # budgeting must not reconfigure the tokenizer generation is using
+    assert registry.tokenizer() is not registry._pipe.tokenizer
+    assert registry.tokenizer() is registry.tokenizer()
+
+
+def test_readyz_waits_for_warmup(monkeypatch):
+    loads = []
+    monkeypatch.setattr(llm, "_build_pipeline", _fake_builder(loads))
+    registry = llm.ModelRegistry("tiny-model", 64)
+    monkeypatch.setattr("api.main.llm_registry", registry)
+    monkeypatch.setattr("api.main.settings.llm_warmup", True)
+    client = TestClient(app)
+
+    assert client.get("/readyz").status_code == 503
+    registry.start_warmup().join()
+    assert client.get("/readyz").json() == {"status": "ok"}
+    assert client.get("/healthz").status_code == 200
+
+
+def test_dead_worker_is_reported_and_replaced(monkeypatch):
+    pools = []
+
+    class FakePool:
+        def __init__(self, **kwargs):
+            self.broken = not pools  # the first worker dies
+            pools.append(self)
+
+        def submit(self, fn, *args):
+            future = Future()
+            if self.broken:
+                future.set_exception(BrokenProcessPool("worker died"))
+            else:
+                future.set_result([p.upper() for p in args[0]] if fn is llm._worker_generate else True)
+            return future
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(llm, "ProcessPoolExecutor", FakePool)
+    registry = llm.ModelRegistry("tiny-model", 64, use_worker=True)
+    monkeypatch.setattr(registry, "tokenizer", lambda: None)
+    registry._ready.set()
+    monkeypatch.setattr(registry, "start_warmup", lambda: None)
+
+    with pytest.raises(BrokenProcessPool):
+        registry.generate(["a"])
+    assert not registry.ready() and isinstance(registry.error, BrokenProcessPool)
+
+    registry._warm()  # what start_warmup runs in the background
+    assert registry.ready() and registry.error is None
+    assert registry.generate(["b"]) == ["B"] and len(pools) == 2
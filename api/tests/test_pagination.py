@@ -0,0 +1,50 @@
+"""
+Tests for cursor tokens and keyset paging of resource listings.
+"""
+import pytest
+from fastapi import HTTPException
+
+from api import resource_count
+from api.pagination import after_id, decode_cursor, encode_cursor
+from api.routers.resources import list_resources
+
+
+def test_cursor_round_trip():
+    token = encode_cursor({"id": 42})
+    assert decode_cursor(token) == {"id": 42}
+    assert after_id(token) == 42
+    assert after_id(None) is None
+    with pytest.raises(ValueError):
+        after_id("not-a-cursor")
+
+
+def test_list_resources_keyset(db, seed_resources):
+    seed_resources(5)
+
+    seen, cursor = [], None
+    while True:
+        page = list_resources(limit=None, page=1, page_size=2, cursor=cursor, count="exact", fields=None, db=db)
+        seen.extend(item.id for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == [1, 2, 3, 4, 5]
+    with pytest.raises(HTTPException):
+        list_resources(limit=None, page=1, page_size=2, cursor="bogus", count="none", fields=None, db=db)
+
+
+def test_count_strategies(db, seed_resources):
+    resource_count.invalidate()
+    seed_resources(3)
+
+    assert resource_count.count_resources(db, "cached") == (3, False)
+    seed_resources(2)
+    # served from the cache until a write invalidates it
+    assert resource_count.count_resources(db, "cached") == (3, False)
+    assert resource_count.count_resources(db, "exact") == (5, False)
+    resource_count.invalidate()
+    # no planner statistics outside Postgres: falls back to the cached exact count
+    assert resource_count.count_resources(db, "estimated") == (5, False)
+    assert resource_count.count_resources(db, "none") == (None, False)
+    resource_count.invalidate()
@@ -0,0 +1,20 @@
+"""
+Tests for keyword query building.
+"""
+from api.query_builder import escape_query, keyword_query
+
+
+def test_escape_query_neutralizes_lucene_syntax():
+    assert escape_query(' title:*soil* AND (C++) ') == r'title\:\*soil\* and \(C\+\+\)'
+
+
+def test_keyword_query_uses_edismax():
+    params = keyword_query("urban soil")
+    assert params["defType"] == "edismax"
+    assert params["q"] == "urban soil"
+    assert "title_prefix" in params["qf"] and "fulltext" in params["qf"]
+    assert "*" not in params["q"]
+
+
+def test_empty_keyword_query_matches_all():
+    assert keyword_query("   ") == {"q": "*:*"}
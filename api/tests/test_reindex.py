@@ -0,0 +1,75 @@
+"""
+Tests for the keyset-paginated Solr reindexer.
+"""
+from api.scripts import reindex as reindex_mod
+
+
+def test_reindex_keyset_batches(engine, seed_resources, monkeypatch):
+    seed_resources(7)
+
+    batches, commits = [], []
+    monkeypatch.setattr(
+        reindex_mod, "index_resources",
+        lambda docs, commit=None, commit_within=None: batches.append((docs, commit)),
+    )
+    monkeypatch.setattr(reindex_mod, "commit_index", lambda soft=False: commits.append(soft))
+
+    sent = reindex_mod.reindex(engine, batch_size=3, workers=2)
+
+    assert sent == 7
+    assert sorted(len(docs) for docs, _ in batches) == [1, 3, 3]
+    assert all(commit is False for _, commit in batches)
+    ids = sorted(int(doc["id"]) for docs, _ in batches for doc in docs)
+    assert ids == list(range(1, 8))
+    assert batches[0][0][0]["resource_type"] == "paper"
+    assert commits == [False]
+
+
+def test_delta_reindex_drains_journal(engine, db, seed_resources, monkeypatch):
+    from api.change_journal import DELETE, record_change
+
+    kept, = seed_resources(1, title="Kept")
+    record_change(db, kept.id)
+    record_change(db, kept.id)
+    record_change(db, 99, DELETE)
+    record_change(db, 42)  # journaled upsert whose row no longer exists
+    db.commit()
+
+    indexed, deleted, commits = [], [], []
+    monkeypatch.setattr(
+        reindex_mod, "index_resources",
+        lambda docs, commit=None, commit_within=None: indexed.extend(docs),
+    )
+    monkeypatch.setattr(
+        reindex_mod, "delete_resources",
+        lambda ids, commit=None, commit_within=None: deleted.extend(ids),
+    )
+    monkeypatch.setattr(reindex_mod, "commit_index", lambda soft=False: commits.append(soft))
+
+    assert reindex_mod.delta_reindex(engine, batch_size=10) == (1, 2)
+    assert [doc["title"] for doc in indexed] == ["Kept"]
+    assert sorted(deleted) == [42, 99]
+    assert commits == [False]
+    # journal drained: a second run has nothing to do
+    assert reindex_mod.delta_reindex(engine) == (0, 0)
+
+
+def test_full_reindex_replays_journaled_deletes(engine, db, seed_resources, monkeypatch):
+    from api.change_journal import DELETE, record_change
+
+    kept, = seed_resources(1, title="Kept")
+    record_change(db, kept.id)
+    record_change(db, 99, DELETE)  # a delete the indexer dropped
+    db.commit()
+
+    deleted = []
+    monkeypatch.setattr(reindex_mod, "index_resources", lambda docs, commit=None, commit_within=None: None)
+    monkeypatch.setattr(
+        reindex_mod, "delete_resources",
+        lambda ids, commit=None, commit_within=None: deleted.append((ids, commit_within)),
+    )
+    monkeypatch.setattr(reindex_mod, "commit_index", lambda soft=False: None)
+
+    assert reindex_mod.reindex(engine, batch_size=10, commit_within=2000) == 1
+    assert deleted == [([99], 2000)]
+    assert reindex_mod.delta_reindex(engine) == (0, 0)
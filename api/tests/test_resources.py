@@ -0,0 +1,97 @@
+"""
+Tests for the resource list and detail projections.
+"""
+from api.routers import resources
+
+
+def test_list_uses_slim_projection(client):
+    body = client.get("/resources", params={"count": "exact"}).json()
+
+    assert body["total"] == 3
+    item = body["items"][0]
+    assert "fulltext" not in item
+    assert item["abstract"] == "a" * 10
+    assert item["type"] == "paper"
+
+
+def test_list_fields_selector(client):
+    body = client.get("/resources", params={"fields": "title,fulltext", "count": "none"}).json()
+
+    assert set(body["items"][0]) == {"id", "title", "fulltext"}
+    assert len(body["items"][0]["fulltext"]) == 5000
+    assert client.get("/resources", params={"fields": "secret"}).status_code == 400
+
+
+def test_detail_defers_fulltext(client):
+    assert "fulltext" not in client.get("/resources/1").json()
+    detail = client.get("/resources/1", params={"fields": "abstract,fulltext"}).json()
+    assert set(detail) == {"id", "abstract", "fulltext"}
+    assert len(detail["fulltext"]) == 5000
+    assert detail["abstract"] == "a" * 50  # not truncated like list abstracts
+
+
+def test_detail_fields_selector(client):
+    assert client.get("/resources/1", params={"fields": "title"}).json() == {"id": 1, "title": "T0"}
+    assert client.get("/resources/1", params={"fields": "secret"}).status_code == 400
+    assert client.get("/resources/99", params={"fields": "title"}).status_code == 404
+
+
+def test_fulltext_stream_range_etag_gzip(client, monkeypatch):
+    monkeypatch.setattr(resources.settings, "fulltext_chunk_bytes", 1000)
+
+    full = client.get("/resources/1/fulltext", headers={"Accept-Encoding": "identity"})
+    assert full.status_code == 200
+    assert full.text == "x" * 5000
+    assert full.headers["content-length"] == "5000"
+    etag = full.headers["etag"]
+
+    assert client.get("/resources/1/fulltext", headers={"If-None-Match": etag, "Accept-Encoding": "identity"}).status_code == 304
+
+    part = client.get("/resources/1/fulltext", headers={"Range": "bytes=4990-"})
+    assert part.status_code == 206
+    assert part.headers["content-range"] == "bytes 4990-4999/5000"
+    assert part.content == b"x" * 10
+    assert client.get("/resources/1/fulltext", headers={"Range": "bytes=9000-"}).status_code == 416
+
+    # TestClient transparently decodes the gzip body
+    gz = client.get("/resources/1/fulltext", headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.text == "x" * 5000
+    assert gz.headers["etag"] != etag
+
+    assert client.get("/resources/99/fulltext").status_code == 404
+
+
+def test_iter_fulltext_byte_ranges_over_multibyte_text(engine, seed_resources, monkeypatch):
+    from api.fulltext import iter_fulltext
+
+    text = "aé€😀" * 50  # 1-, 2-, 3- and 4-byte characters
+    seed_resources(1, fulltext=text)
+    data = text.encode("utf-8")
+    monkeypatch.setattr(resources.settings, "fulltext_chunk_bytes", 7)
+
+    assert b"".join(iter_fulltext(engine, 1, 0, len(data) - 1)) == data
+    assert b"".join(iter_fulltext(engine, 1, 5, 123)) == data[5:124]
+    assert b"".join(iter_fulltext(engine, 1, len(data) - 3, len(data) - 1)) == data[-3:]
+
+
+def test_fulltext_validators_and_gzip_negotiation(client, db):
+    from datetime import datetime
+
+    from api.fulltext import accepts_gzip
+    from api.models import ResourceModel
+
+    resource = db.get(ResourceModel, 1)
+    resource.updated_at = datetime(2024, 1, 1, 12, 0, 0, 100)
+    db.commit()
+    etag = client.get("/resources/1/fulltext", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    # a same-length edit within the same second is a new version
+    resource.fulltext, resource.updated_at = "y" * 5000, datetime(2024, 1, 1, 12, 0, 0, 900)
+    db.commit()
+    fresh = client.get("/resources/1/fulltext", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert fresh.status_code == 200 and fresh.text == "y" * 5000
+
+    refused = client.get("/resources/1/fulltext", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in refused.headers
+    assert accepts_gzip("deflate, gzip;q=0.5") and accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0, *") and not accepts_gzip("identity") and not accepts_gzip(None)
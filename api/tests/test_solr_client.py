@@ -0,0 +1,194 @@
+"""
+Tests for the Solr client and its pooled transport.
+"""
+import pytest
+
+from api import search_cache, solr_client, solr_transport
+
+
+@pytest.fixture(autouse=True)
+def empty_search_cache(monkeypatch):
+    search_cache._local.clear()
+    # a searcher version read moments ago, so tests see only their own requests
+    monkeypatch.setattr(search_cache, "_searcher", (search_cache.time.monotonic(), 1))
+    monkeypatch.setattr(search_cache.settings, "search_cache_version_ttl", 3600.0)
+    yield
+    search_cache._local.clear()
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+def test_search_uses_pooled_session(monkeypatch):
+    calls = []
+    payload = {
+        "response": {"numFound": 1, "docs": [{"id": "7", "title": ["T"], "date": ["2020-01-01"]}]},
+        "facet_counts": {"facet_fields": {"provider": ["p", 3]}},
+    }
+
+    def fake_request(method, url, **kwargs):
+        calls.append((method, url, kwargs))
+        return FakeResponse(payload)
+
+    monkeypatch.setattr(solr_transport.session, "request", fake_request)
+    result = solr_client.search_resources("*:*", facet_fields=["provider"])
+
+    method, url, kwargs = calls[0]
+    assert (method, url) == ("GET", f"{solr_transport.SOLR_BASE}/select")
+    assert kwargs["timeout"] == solr_transport.SOLR_TIMEOUT
+    assert result["items"] == [{"id": "7", "title": "T", "authors": [], "date": "2020-01-01"}]
+    assert result["facets"]["provider"] == [{"label": "p", "value": "p", "count": 3}]
+
+
+def test_pool_metrics_collect():
+    names = {family.name for family in solr_transport._collector.collect()}
+    assert {"solr_pool_connections_created", "solr_pool_idle_connections"} <= names
+
+
+def test_async_search_uses_async_pool(monkeypatch):
+    import asyncio
+
+    import httpx
+
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"response": {"numFound": 2, "docs": [{"id": "1", "title": "A"}]}})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(solr_transport, "get_async_client", lambda: client)
+
+    result = asyncio.run(solr_client.async_semantic_search_resources("soil", top_k=3, filters={"provider": "p"}))
+
+    assert seen[0].url.path.endswith("/select")
+    assert seen[0].url.params["knn.q"] == "soil"
+    assert seen[0].url.params["fq"] == "provider:p"
+    assert result == {"items": [{"id": "1", "title": "A", "authors": [], "date": None}], "total": 2, "page_size": 10, "facets": {}}
+
+
+def test_search_cache_hits_until_index_changes(monkeypatch):
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(kwargs["params"])
+        return FakeResponse({"response": {"numFound": len(calls), "docs": []}})
+
+    monkeypatch.setattr(solr_transport.session, "request", fake_request)
+    monkeypatch.setattr(solr_client._solr, "add", lambda docs, **kwargs: None)
+
+    first = solr_client.search_resources("  soil   carbon ", filters={"keywords": ["b", "a"]})
+    again = solr_client.search_resources("soil carbon", filters={"keywords": ["a", "b"]})
+    assert len(calls) == 1 and again == first
+
+    solr_client.index_resources([{"id": "1"}])
+    assert solr_client.search_resources("soil carbon", filters={"keywords": ["a", "b"]})["total"] == 2
+    assert len(calls) == 2
+
+
+def test_search_cache_follows_solr_index_version(monkeypatch):
+    versions, selects = [7], []
+
+    def fake_request(method, url, **kwargs):
+        if url.endswith("/admin/luke"):
+            return FakeResponse({"index": {"version": versions[0]}})
+        selects.append(url)
+        return FakeResponse({"response": {"numFound": len(selects), "docs": []}})
+
+    monkeypatch.setattr(solr_transport.session, "request", fake_request)
+    monkeypatch.setattr(search_cache.settings, "search_cache_version_ttl", 0.0)
+
+    solr_client.search_resources("soil")
+    solr_client.search_resources("soil")
+    assert len(selects) == 1
+
+    # another process wrote and Solr committed: no local bump, but a new searcher
+    versions[0] = 8
+    assert solr_client.search_resources("soil")["total"] == 2
+
+
+def test_commit_within_write_invalidates_again_once_visible(monkeypatch):
+    monkeypatch.setattr(solr_client._solr, "add", lambda docs, **kwargs: None)
+    before = search_cache._local_version
+
+    solr_client.index_resources([{"id": "1"}], commit=False, commit_within=50)
+    solr_client.index_resources([{"id": "2"}], commit=False, commit_within=50)
+    assert search_cache._local_version == before + 2
+    search_cache._deferred.join(5)
+    assert search_cache._local_version == before + 3  # one coalesced bump after the window
+
+
+def test_local_cache_lru_and_ttl(monkeypatch):
+    cache = search_cache.LocalCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    now = search_cache.time.monotonic()
+    monkeypatch.setattr(search_cache.time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+
+
+def test_local_cache_counts_evictions_in_its_own_metric():
+    from api.routers import exhibits
+
+    def evicted(counter):
+        return counter.labels("lru")._value.get()
+
+    search_before, exhibit_before = evicted(search_cache.CACHE_EVICTIONS), evicted(exhibits.EXHIBIT_CACHE_EVICTIONS)
+    cache = search_cache.LocalCache(maxsize=1, ttl=10, evictions=exhibits.EXHIBIT_CACHE_EVICTIONS)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert evicted(exhibits.EXHIBIT_CACHE_EVICTIONS) == exhibit_before + 1
+    assert evicted(search_cache.CACHE_EVICTIONS) == search_before
+
+
+def test_search_cursor_mark(monkeypatch):
+    calls = []
+    pages = {
+        "*": {"response": {"numFound": 1, "docs": [{"id": "1"}]}, "nextCursorMark": "AoE1"},
+        "AoE1": {"response": {"numFound": 1, "docs": []}, "nextCursorMark": "AoE1"},
+    }
+
+    def fake_request(method, url, **kwargs):
+        calls.append(kwargs["params"])
+        return FakeResponse(pages[kwargs["params"]["cursorMark"]])
+
+    monkeypatch.setattr(solr_transport.session, "request", fake_request)
+
+    first = solr_client.search_resources("", page_size=1, cursor="*")
+    last = solr_client.search_resources("", page_size=1, cursor=first["next_cursor"])
+
+    assert first["next_cursor"] == "AoE1"
+    assert last["next_cursor"] is None
+    assert calls[0]["sort"] == solr_client.CURSOR_SORT
+    assert "start" not in calls[0]
+
+
+def test_rejected_cursor_is_a_bad_request(monkeypatch):
+    import httpx
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    def handler(request):
+        return httpx.Response(400, json={"error": {"msg": "Unable to parse 'cursorMark' after totem"}})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(solr_transport, "get_async_client", lambda: client)
+
+    response = TestClient(app).get("/search/", params={"cursor": "bogus"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
@@ -0,0 +1,103 @@
+"""
+Tests for the summary endpoint and its persistent cache.
+"""
+from api.routers import summary
+from api.summary_cache import SummaryCache, summary_key
+
+
+def test_summary_key_tracks_content_and_model():
+    base = summary_key(["2", "1"], ["a", "b"], "chapter", "m1")
+    assert base == summary_key(["1", "2"], ["a", "b"], "chapter", "m1")
+    assert base != summary_key(["1", "2"], ["a", "changed"], "chapter", "m1")
+    assert base != summary_key(["1", "2"], ["a", "b"], "key_takeaways", "m1")
+    assert base != summary_key(["1", "2"], ["a", "b"], "chapter", "m2")
+    # the topic and budget shape the prompt
+    topical = summary_key(["1", "2"], ["a", "b"], "chapter", "m1", topic="soil  carbon")
+    assert topical == summary_key(["1", "2"], ["a", "b"], "chapter", "m1", topic="soil carbon")
+    assert topical not in (base, summary_key(["1", "2"], ["a", "b"], "chapter", "m1", topic="wetlands"))
+    assert base != summary_key(["1", "2"], ["a", "b"], "chapter", "m1", prompt_options={"context_tokens": 256})
+
+
+def test_summary_cache_lru(tmp_path):
+    cache = SummaryCache(str(tmp_path / "s.sqlite3"), maxsize=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"  # refreshes 'a'
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    # persisted across instances
+    assert SummaryCache(str(tmp_path / "s.sqlite3"), maxsize=2).get("c") == "C"
+
+
+def test_summary_endpoint_reuses_cached_output(client, tokenizer, tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_generate(prompt):
+        calls.append(prompt)
+        return "generated"
+
+    monkeypatch.setattr(summary, "summaries", SummaryCache(str(tmp_path / "s.sqlite3"), maxsize=10))
+    monkeypatch.setattr(summary.scheduler, "agenerate", fake_generate)
+    client.app.include_router(summary.router)
+
+    body = {"document_ids": ["2", "1", "99"], "summary_type": "chapter"}
+    first = client.post("/summary/", json=body).json()
+    again = client.post("/summary/", json={**body, "document_ids": ["1", "2"]}).json()
+
+    assert first == {"summary": "generated", "cached": False}
+    assert again == {"summary": "generated", "cached": True}
+    assert len(calls) == 1 and "a" * 50 in calls[0]
+    assert client.post("/summary/", json={"document_ids": ["99"]}).status_code == 404
+
+
+def test_summary_stream_sends_events_and_caches(client, tokenizer, tmp_path, monkeypatch):
+    async def fake_stream(prompt, is_disconnected=None):
+        for piece in ["Line one", "\nline two"]:
+            yield piece
+
+    monkeypatch.setattr(summary, "summaries", SummaryCache(str(tmp_path / "s.sqlite3"), maxsize=10))
+    monkeypatch.setattr(summary, "stream_generate", fake_stream)
+    client.app.include_router(summary.router)
+
+    response = client.post("/summary/stream", json={"document_ids": ["1"]})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == "data: Line one\n\ndata: \ndata: line two\n\nevent: done\ndata: \n\n"
+
+    cached = client.post("/summary/", json={"document_ids": ["1"]}).json()
+    assert cached == {"summary": "Line one\nline two", "cached": True}
+    assert client.post("/summary/stream", json={"document_ids": ["99"]}).status_code == 404
+
+
+def test_topic_summary_keeps_semantic_ranking(client, db, tokenizer, tmp_path, monkeypatch):
+    from api.models import ResourceModel
+
+    for rid, abstract in [(1, "soil carbon storage"), (2, "unrelated"), (3, "wetland restoration")]:
+        db.get(ResourceModel, rid).abstract = abstract
+    db.commit()
+    prompts = []
+
+    async def fake_search(query, top_k, filters, page, page_size):
+        return {"items": [{"id": 3}, {"id": 1}, {"id": 99}]}
+
+    async def fake_generate(prompt):
+        prompts.append(prompt)
+        return "generated"
+
+    monkeypatch.setattr(summary, "summaries", SummaryCache(str(tmp_path / "s.sqlite3"), maxsize=10))
+    monkeypatch.setattr(summary, "async_semantic_search_resources", fake_search)
+    monkeypatch.setattr(summary.scheduler, "agenerate", fake_generate)
+    client.app.include_router(summary.router)
+
+    assert client.post("/summary/", json={"topic": "soil carbon"}).json()["summary"] == "generated"
+    # the best kNN hit stays first even though the other shares more words with the topic
+    assert prompts[0].index("wetland restoration") < prompts[0].index("soil carbon storage")
+
+
+def test_summary_cache_unusable_path_misses(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = SummaryCache(str(blocker / "sub" / "s.sqlite3"), maxsize=2)  # parent cannot be created
+    cache.set("a", "A")
+    cache.clear()
+    assert cache.get("a") is None
@@ -12,9 +12,24 @@ CREATE TABLE IF NOT EXISTS resources (
     url TEXT,                   -- Store URL as plain text (VARCHAR is also fine)
     keywords JSONB,             -- Store list of keywords as JSONB
     provider VARCHAR(255),
-    fulltext TEXT
+    fulltext TEXT,
+    content_hash VARCHAR(64),   -- sha256 of the loaded content, lets reloads skip unchanged rows
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
 );
 
+-- Change journal (outbox) written in the same transaction as resource writes;
+-- the delta reindexer drains it into Solr
+CREATE TABLE IF NOT EXISTS resource_changes (
+    id SERIAL PRIMARY KEY,
+    resource_id INTEGER NOT NULL,
+    op VARCHAR(8) NOT NULL,     -- 'upsert' or 'delete'
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_resource_changes_resource_id ON resource_changes (resource_id);
+
+-- Keep fulltext uncompressed out of line so substr() reads only the slice it needs
+ALTER TABLE resources ALTER COLUMN fulltext SET STORAGE EXTERNAL;
+
 CREATE TABLE IF NOT EXISTS exhibits (
     id SERIAL PRIMARY KEY,      -- Auto-incrementing primary key
     slug VARCHAR(255) UNIQUE NOT NULL, -- Unique slug for the exhibit
@@ -26,6 +26,13 @@ API_URL = os.getenv('API_URL', 'http://api:8000/resources')
 API_SCHEDULE_HOUR = int(os.getenv('API_SCHEDULE_HOUR', '4'))
 API_SCHEDULE_MINUTE = int(os.getenv('API_SCHEDULE_MINUTE', '0'))
 
+# Delta Solr sync from the resource change journal
+SEARCH_SYNC_MINUTES = int(os.getenv('SEARCH_SYNC_MINUTES', '5'))
+
+# Exhibit summary precompute (after the nightly harvests)
+SUMMARY_SCHEDULE_HOUR = int(os.getenv('SUMMARY_SCHEDULE_HOUR', '5'))
+SUMMARY_SCHEDULE_MINUTE = int(os.getenv('SUMMARY_SCHEDULE_MINUTE', '0'))
+
 # Celery Beat schedule
 beat_schedule = {
     'harvest-oai': {
@@ -43,6 +50,18 @@ beat_schedule = {
         'schedule': crontab(hour=API_SCHEDULE_HOUR, minute=API_SCHEDULE_MINUTE),
         'args': (API_URL,),
     },
+    # push journaled resource changes to Solr
+    'sync-search-index': {
+        'task': 'sync_search_index',
+        'schedule': crontab(minute=f'*/{SEARCH_SYNC_MINUTES}'),
+        'args': (),
+    },
+    # generate chapter summaries for exhibit resource sets ahead of page views
+    'precompute-exhibit-summaries': {
+        'task': 'precompute_exhibit_summaries',
+        'schedule': crontab(hour=SUMMARY_SCHEDULE_HOUR, minute=SUMMARY_SCHEDULE_MINUTE),
+        'args': ('chapter',),
+    },
     # prune old raw harvest files daily
     'prune-old-harvests': {
         'task': 'etl.etl_tasks.prune_old_harvests',
@@ -6,13 +6,16 @@ import importlib
 
 import pytest
 import logging
+import threading
 
 
 # Dummy HTTP response for requests.get
 class DummyResponse:
-    def __init__(self, content=None, json_data=None):
+    def __init__(self, content=None, json_data=None, status_code=200, headers=None):
         self.content = content
         self._json = json_data
+        self.status_code = status_code
+        self.headers = headers or {}
 
     def raise_for_status(self):
         # no-op for dummy responses
@@ -21,6 +24,15 @@ class DummyResponse:
     def json(self):
         return self._json
 
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        # emulate a streamed body delivered in small pieces
+        data = self.content or b''
+        for i in range(0, len(data), 7):
+            yield data[i:i + 7]
+
+    def close(self):
+        return None
+
 
 @pytest.fixture(autouse=True)
 def reload_tasks(tmp_path, monkeypatch):
@@ -33,6 +45,7 @@ def reload_tasks(tmp_path, monkeypatch):
     monk_env('OAI_DIR', str(tmp_path / 'oai'))
     monk_env('RSS_DIR', str(tmp_path / 'rss'))
     monk_env('API_DIR', str(tmp_path / 'api'))
+    monk_env('ETL_STATE_DIR', str(tmp_path / 'state'))
     monk_env('OPEN_ALEX_CSV', str(tmp_path / 'data.csv'))
     # Use an on-disk SQLite DB for tests
     db_file = tmp_path / 'test.db'
@@ -58,6 +71,82 @@ def test_harvest_oai(tmp_path, reload_tasks, monkeypatch):
     assert files[0].read_bytes() == xml_data
 
 
+def test_harvest_oai_streams_resumption_pages(tmp_path, reload_tasks, monkeypatch):
+    tasks = reload_tasks
+    ns = 'xmlns="http://www.openarchives.org/OAI/2.0/"'
+    pages = [
+        f'<OAI-PMH {ns}><ListRecords><record><header><identifier>a</identifier></header></record>'
+        f'<record><header><identifier>b</identifier></header></record>'
+        f'<resumptionToken>tok1</resumptionToken></ListRecords></OAI-PMH>'.encode(),
+        f'<OAI-PMH {ns}><ListRecords><record><header><identifier>c</identifier></header></record>'
+        f'<resumptionToken/></ListRecords></OAI-PMH>'.encode(),
+    ]
+    calls = []
+
+    def fake_get(url, params=None, timeout=None, **kwargs):
+        calls.append(dict(params))
+        return DummyResponse(content=pages[len(calls) - 1])
+
+    monkeypatch.setattr(tasks.requests, 'get', fake_get)
+    records = []
+    tasks.harvest_oai('http://fake', 'prefix', on_record=records.append)
+    assert calls[1] == {'verb': 'ListRecords', 'resumptionToken': 'tok1'}
+    assert len(records) == 3
+    assert b'<ns0:identifier>c</ns0:identifier>' in records[2]
+    files = sorted((tmp_path / 'oai').iterdir(), key=lambda p: p.name[-5])
+    assert [f.read_bytes() for f in files] == pages
+
+
+def test_harvest_oai_incremental_and_resume(tmp_path, reload_tasks, monkeypatch):
+    tasks = reload_tasks
+    ns = 'xmlns="http://www.openarchives.org/OAI/2.0/"'
+    first = (
+        f'<OAI-PMH {ns}><responseDate>2024-05-01T02:00:00Z</responseDate><ListRecords>'
+        f'<record/><resumptionToken>tok1</resumptionToken></ListRecords></OAI-PMH>'
+    ).encode()
+    last = (
+        f'<OAI-PMH {ns}><responseDate>2024-05-01T02:00:05Z</responseDate><ListRecords>'
+        f'<record/><resumptionToken/></ListRecords></OAI-PMH>'
+    ).encode()
+    calls = []
+
+    def crashing_get(url, params=None, timeout=None, **kwargs):
+        calls.append(dict(params))
+        if len(calls) > 1:
+            raise Exception("connection reset")
+        return DummyResponse(content=first)
+
+    # run dies after the first page: the token is checkpointed
+    monkeypatch.setattr(tasks.requests, 'get', crashing_get)
+    tasks.harvest_oai('http://fake', 'prefix')
+    state = json.loads(tasks.OAI_STATE_FILE.read_text(encoding='utf-8'))['http://fake|prefix']
+    assert state['resumption_token'] == 'tok1'
+    assert state['last_datestamp'] is None
+
+    # next run resumes from the token and records the watermark on completion
+    calls.clear()
+    monkeypatch.setattr(
+        tasks.requests, 'get',
+        lambda url, params=None, timeout=None, **kw: calls.append(dict(params)) or DummyResponse(content=last),
+    )
+    tasks.harvest_oai('http://fake', 'prefix')
+    assert calls == [{'verb': 'ListRecords', 'resumptionToken': 'tok1'}]
+    state = json.loads(tasks.OAI_STATE_FILE.read_text(encoding='utf-8'))['http://fake|prefix']
+    assert state == {'last_datestamp': '2024-05-01T02:00:00Z', 'harvest_started': None, 'resumption_token': None}
+
+    # a later run is a selective harvest from the watermark
+    calls.clear()
+    no_match = f'<OAI-PMH {ns}><error code="noRecordsMatch"/></OAI-PMH>'.encode()
+    monkeypatch.setattr(
+        tasks.requests, 'get',
+        lambda url, params=None, timeout=None, **kw: calls.append(dict(params)) or DummyResponse(content=no_match),
+    )
+    tasks.harvest_oai('http://fake', 'prefix')
+    assert calls == [{'verb': 'ListRecords', 'metadataPrefix': 'oai_dc', 'from': '2024-05-01'}]
+    # the <error> page is not saved as harvest data
+    assert not [f for f in (tmp_path / 'oai').iterdir() if b'noRecordsMatch' in f.read_bytes()]
+
+
 def test_harvest_rss(tmp_path, reload_tasks, monkeypatch):
     tasks = reload_tasks
     # Fake feed with one PDF link
@@ -78,6 +167,113 @@ def test_harvest_rss(tmp_path, reload_tasks, monkeypatch):
     assert txts[0].read_text(encoding='utf-8') == 'text content'
 
 
+def test_harvest_rss_concurrent_pipeline(tmp_path, reload_tasks, monkeypatch):
+    tasks = reload_tasks
+    links = [f'http://host{i % 2}/doc{i}.pdf' for i in range(6)]
+    monkeypatch.setattr(
+        tasks.feedparser, 'parse',
+        lambda url: type('F', (), {'entries': [{'link': link} for link in links]})(),
+    )
+    monkeypatch.setattr(
+        tasks.requests, 'get',
+        lambda url, timeout=None, **kwargs: DummyResponse(content=url.encode()),
+    )
+    monkeypatch.setattr(
+        tasks.parser, 'from_file',
+        lambda path: {'content': [open(path, 'rb').read().decode()]},
+    )
+    summary = tasks.harvest_rss('ignored')
+    assert summary['download']['items'] == 6
+    assert summary['extract']['items'] == 6
+    assert summary['download']['bytes'] == sum(len(link) for link in links)
+    txt = (tmp_path / 'rss' / 'doc3.pdf.txt').read_text(encoding='utf-8')
+    assert txt == 'http://host1/doc3.pdf'
+
+
+def test_harvest_rss_backlog_does_not_cap_downloads(tmp_path, reload_tasks, monkeypatch):
+    tasks = reload_tasks
+    links = [f'http://host{i}/doc{i}.pdf' for i in range(3)]
+    monkeypatch.setattr(
+        tasks.feedparser, 'parse',
+        lambda url: type('F', (), {'entries': [{'link': link} for link in links]})(),
+    )
+    # one extraction slot in total, but all three downloads must run at once
+    monkeypatch.setattr(tasks, 'RSS_EXTRACT_WORKERS', 1)
+    monkeypatch.setattr(tasks, 'RSS_EXTRACT_BACKLOG', 0)
+    monkeypatch.setattr(tasks, 'RSS_DOWNLOAD_WORKERS', 3)
+    together = threading.Barrier(3, timeout=5)
+
+    def fake_get(url, timeout=None, **kwargs):
+        together.wait()
+        return DummyResponse(content=url.encode())
+
+    monkeypatch.setattr(tasks.requests, 'get', fake_get)
+    monkeypatch.setattr(tasks.parser, 'from_file', lambda path: {'content': ['text']})
+    summary = tasks.harvest_rss('ignored')
+    assert (summary['download']['items'], summary['download']['failed']) == (3, 0)
+    assert summary['extract']['items'] == 3
+
+
+def test_harvest_rss_reuses_cached_text(tmp_path, reload_tasks, monkeypatch):
+    tasks = reload_tasks
+    monkeypatch.setattr(
+        tasks.feedparser, 'parse',
+        lambda url: type('F', (), {'entries': [{'link': 'http://x/test.pdf'}]})(),
+    )
+    sent_headers = []
+    responses = [
+        DummyResponse(content=b'%PDF-1.4 v1', headers={'ETag': '"v1"'}),
+        DummyResponse(content=b'', status_code=304),
+        DummyResponse(content=b'%PDF-1.4 v1'),  # same body, validators dropped
+    ]
+
+    def fake_get(url, timeout=None, headers=None, **kwargs):
+        sent_headers.append(headers or {})
+        return responses[len(sent_headers) - 1]
+
+    extracted = []
+    monkeypatch.setattr(tasks.requests, 'get', fake_get)
+    monkeypatch.setattr(
+        tasks.parser, 'from_file',
+        lambda path: extracted.append(path) or {'content': ['text content']},
+    )
+    for _ in responses:
+        tasks.harvest_rss('ignored')
+    assert len(extracted) == 1
+    assert sent_headers[1] == {'If-None-Match': '"v1"'}
+    assert (tmp_path / 'rss' / 'test.pdf').read_bytes() == b'%PDF-1.4 v1'
+    assert (tmp_path / 'rss' / 'test.pdf.txt').read_text(encoding='utf-8') == 'text content'
+
+    # prune enforces the cache size bound
+    monkeypatch.setattr(tasks, 'RSS_CACHE_MAX_BYTES', 0)
+    tasks.prune_old_harvests()
+    assert not list((tmp_path / 'rss' / '.cache' / 'blobs').iterdir())
+    assert (tmp_path / 'rss' / 'test.pdf.txt').exists()
+
+
+def test_rss_cache_index_is_shared_between_processes(tmp_path, reload_tasks):
+    tasks = reload_tasks
+    root = tmp_path / 'cache'
+    # two instances stand in for two worker processes with their own view of index.json
+    harvest, prune = tasks._RssCache(root), tasks._RssCache(root)
+    harvest.put_pdf('a' * 64, b'pdf a')
+    harvest.put_text('a' * 64, 'text a')
+    harvest.remember('http://x/a.pdf', 'a' * 64)
+    prune.put_pdf('b' * 64, b'pdf b')
+    prune.remember('http://x/b.pdf', 'b' * 64)
+
+    with harvest.in_use():
+        # eviction waits for running harvests instead of deleting their blobs
+        assert prune.evict(max_bytes=0) == 0
+        assert harvest.pdf_path('a' * 64).exists()
+    harvest.save()
+
+    index = tasks._RssCache(root)._index
+    assert set(index['urls']) == {'http://x/a.pdf', 'http://x/b.pdf'}
+    assert prune.evict(max_bytes=0) > 0
+    assert tasks._RssCache(root)._index == {'urls': {}, 'blobs': {}}
+
+
 def test_harvest_api(tmp_path, reload_tasks, monkeypatch):
     tasks = reload_tasks
     payload = {'k': 'v'}
@@ -118,9 +314,89 @@ def test_load_integral_ecology(tmp_path, reload_tasks):
     r = results[0]
     assert r.title == 'T'
     assert isinstance(r.authors, list) and r.authors == ['A', 'B']
+    # journaled with the chunk that wrote it
+    changes = session.query(reload_tasks.ResourceChangeModel).all()
+    assert [(c.resource_id, c.op) for c in changes] == [(r.id, 'upsert')]
     session.close()
 
 
+def test_load_integral_ecology_journals_committed_chunks(tmp_path, reload_tasks, monkeypatch):
+    tasks = reload_tasks
+    fields = ['title', 'type', 'date', 'authors', 'abstract', 'doi', 'url', 'keywords', 'provider', 'fulltext']
+    with open(tmp_path / 'data.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for title in ('One', 'Two'):
+            writer.writerow({'title': title, 'type': 'paper', 'date': '2020-01-01', 'abstract': 'abs', 'provider': 'p'})
+
+    from api.database import Base
+    Base.metadata.create_all(tasks.engine)
+
+    prepare = tasks._prepare_openalex_chunk
+    calls = []
+
+    def crash_on_second(chunk):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise RuntimeError('worker killed')
+        return prepare(chunk)
+
+    monkeypatch.setenv('ETL_CHUNK_SIZE', '1')
+    monkeypatch.setattr(tasks, '_prepare_openalex_chunk', crash_on_second)
+    with pytest.raises(RuntimeError):
+        tasks.load_integral_ecology(mode='insert')
+    with tasks.SessionLocal() as session:
+        ids = [r.id for r in session.query(tasks.Resource).all()]
+        journaled = [c.resource_id for c in session.query(tasks.ResourceChangeModel).all()]
+    # the chunk that committed before the crash is journaled
+    assert len(ids) == 1 and journaled == ids
+
+
+def test_load_integral_ecology_upsert(tmp_path, reload_tasks):
+    tasks = reload_tasks
+    fields = ['title', 'type', 'date', 'authors', 'abstract', 'doi', 'url', 'keywords', 'provider', 'fulltext']
+
+    def write_csv(rows):
+        with open(tmp_path / 'data.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for title, doi in rows:
+                writer.writerow({
+                    'title': title, 'type': 'paper', 'date': '2020-01-01', 'authors': 'A',
+                    'abstract': 'abs', 'doi': doi, 'url': '', 'keywords': 'k', 'provider': 'p', 'fulltext': '',
+                })
+
+    from api.database import Base
+    Base.metadata.create_all(tasks.engine)
+
+    write_csv([('One', '10.1/a'), ('Two', '10.1/b'), ('No DOI', '')])
+    assert tasks.load_integral_ecology(mode='upsert') == {'inserted': 3, 'updated': 0, 'unchanged': 0}
+    # re-running the same file is a no-op
+    assert tasks.load_integral_ecology(mode='upsert') == {'inserted': 0, 'updated': 0, 'unchanged': 3}
+
+    write_csv([('One (revised)', '10.1/a'), ('Two', '10.1/b'), ('No DOI', ''), ('Three', '10.1/c')])
+    assert tasks.load_integral_ecology(mode='upsert') == {'inserted': 1, 'updated': 1, 'unchanged': 2}
+    with tasks.SessionLocal() as session:
+        titles = sorted(r.title for r in session.query(tasks.Resource).all())
+        journaled = session.query(tasks.ResourceChangeModel).count()
+    assert titles == ['No DOI', 'One (revised)', 'Three', 'Two']
+    # every written row (3 + 0 + 2) is journaled for the delta reindexer
+    assert journaled == 5
+
+
+def test_prepare_openalex_chunk(reload_tasks):
+    pd = reload_tasks.pd
+    chunk = pd.DataFrame({
+        'title': ['A', 'B'], 'type': ['paper', 'paper'], 'date': ['2020-01-01', 'not a date'],
+        'authors': [' X ; Y;', None], 'keywords': [None, 'k1;;k2'], 'doi': [None, '10.1/x'],
+    })
+    rows = reload_tasks._prepare_openalex_chunk(chunk).to_dict('records')
+    assert rows[0]['authors'] == ['X', 'Y'] and rows[0]['keywords'] == []
+    assert rows[1]['authors'] == [] and rows[1]['keywords'] == ['k1', 'k2']
+    assert str(rows[0]['date']) == '2020-01-01' and rows[1]['date'] is None
+    assert rows[0]['doi'] is None and rows[0]['fulltext'] is None
+
+
 def test_harvest_oai_http_error(tmp_path, reload_tasks, monkeypatch, caplog):
     tasks = reload_tasks
     caplog.set_level(logging.ERROR)
@@ -182,3 +458,28 @@ def test_harvest_api_http_error(tmp_path, reload_tasks, monkeypatch, caplog):
     tasks.harvest_api('ignored')
     assert not list((tmp_path / 'api').iterdir())
     assert "API harvest failed for" in caplog.text
+
+
+def test_precompute_exhibit_summaries(tmp_path, reload_tasks, monkeypatch):
+    tasks = reload_tasks
+    from api.database import Base
+    from api.models import ExhibitModel
+    Base.metadata.create_all(tasks.engine)
+    with tasks.SessionLocal() as db:
+        db.add_all([
+            ExhibitModel(slug='soil', title='Soil', narrative='n', resources=[1, 2]),
+            ExhibitModel(slug='empty', title='Empty', narrative='n', resources=[]),
+        ])
+        db.commit()
+
+    posted = []
+
+    def fake_post(url, json=None, timeout=None):
+        posted.append(json)
+        return DummyResponse(json_data={'summary': 's', 'cached': False})
+
+    monkeypatch.setattr(tasks.requests, 'post', fake_post)
+    result = tasks.precompute_exhibit_summaries()
+
+    assert posted == [{'document_ids': ['1', '2'], 'summary_type': 'chapter'}]
+    assert result == {'summarized': 1, 'cached': 0, 'failed': 0}
@@ -22,7 +22,7 @@ export default function ExhibitPage() {
 
   useEffect(() => {
     if (!slug) return
-    fetch(`${process.env.API_URL}/exhibits/${slug}`)
+    fetch(`${process.env.API_URL}/exhibits/${slug}?expand=resources`)
       .then((res) => res.json())
       .then((data: Exhibit) => setExhibit(data))
   }, [slug])